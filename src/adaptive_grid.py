@@ -0,0 +1,154 @@
+import math
+from fractions import Fraction
+
+import numpy as np
+
+from ising_model import as_ising
+
+# Budget of points for the coarse grid when no resolution is given
+COARSE_POINTS = 4096
+# Longer gamma periods (from weights with large denominators) are not worth searching
+MAX_GAMMA_PERIOD = 4 * 2 * np.pi
+
+
+def gamma_period(bqm, max_denominator=1000):
+    """
+    Period T of <C> in every gamma, or None if there is none or it exceeds MAX_GAMMA_PERIOD.
+
+    In 0/1 variables C = const + sum a_i x_i + sum b_ij x_i x_j, so all energies differ by
+    integer multiples of g = gcd(a, b) whenever those coefficients are rational, and
+    exp(-i T C) is a global phase for T = 2 pi / g. Integer vertex weights give integer
+    energies and T = 2 pi, the gamma range of estimator_run_qaoa_grid.
+    """
+    ising = as_ising(bqm)
+    # z = 1 - 2x: h z = h - 2 h x and J z_u z_v = J - 2 J (x_u + x_v) + 4 J x_u x_v
+    linear = -2 * ising.h.copy()
+    np.subtract.at(linear, ising.edges[:, 0], 2 * ising.J)
+    np.subtract.at(linear, ising.edges[:, 1], 2 * ising.J)
+    coefficients = np.concatenate([linear, 4 * ising.J])
+
+    g = Fraction(0)
+    for value in coefficients.tolist():
+        fraction = Fraction(value).limit_denominator(max_denominator)
+        if not math.isclose(float(fraction), value, rel_tol=1e-9, abs_tol=1e-12):
+            return None
+        g = Fraction(math.gcd(g.numerator * fraction.denominator, fraction.numerator * g.denominator),
+                     g.denominator * fraction.denominator)
+    if not g:
+        return None
+    period = 2 * np.pi / float(g)
+    return period if period <= MAX_GAMMA_PERIOD else None
+
+
+def search_domain(bqm, p):
+    """
+    Lower and upper bounds of the [betas, gammas] box that contains one copy of every
+    distinct <C> value:
+      - betas span [0, pi): exp(-i pi X) = -I, so every beta has period pi;
+      - gammas span one period [0, T) (see gamma_period), or [0, 2 pi) if there is none;
+      - since <C> is real, conjugating the circuit gives C(beta, gamma) = C(-beta, -gamma),
+        i.e. C(pi - beta, T - gamma) with all layers flipped together, so the first gamma
+        only needs [0, T / 2] when the period exists.
+    """
+    period = gamma_period(bqm)
+    lower = np.zeros(2 * p)
+    upper = np.concatenate([np.full(p, np.pi), np.full(p, period or 2 * np.pi)])
+    if period is not None:
+        upper[p] = period / 2
+    return lower, upper
+
+
+def canonical_angles(beta, gamma, period):
+    """
+    Copy of the angles inside the search_domain box, with the same <C>: betas mod pi,
+    gammas mod the period T, then C(pi - beta, T - gamma) on all layers if the first
+    gamma is above T / 2. Without a period (None) the gammas are not reduced and the
+    reversal C(-beta, -gamma) only makes the first gamma non-negative.
+    """
+    beta = np.asarray(beta, dtype=float)
+    gamma = np.asarray(gamma, dtype=float)
+    if period is None:
+        if gamma[0] < 0:
+            beta, gamma = -beta, -gamma
+        return np.mod(beta, np.pi), gamma
+    beta, gamma = np.mod(beta, np.pi), np.mod(gamma, period)
+    if gamma[0] > period / 2:
+        beta, gamma = np.mod(np.pi - beta, np.pi), np.mod(period - gamma, period)
+    return beta, gamma
+
+
+def _evaluate(batch_cost_function, points, chunk_size):
+    return np.concatenate([np.asarray(batch_cost_function(points[start:start + chunk_size]), dtype=float)
+                           for start in range(0, len(points), chunk_size)])
+
+
+def _cell_grid(counts):
+    """Integer coordinates of every cell of a grid with counts[d] cells along axis d."""
+    return np.indices(counts).reshape(len(counts), -1).T
+
+
+def _coarse_counts(widths, budget):
+    """
+    Cells per axis, as close to proportional to the axis widths as possible, with at most
+    budget cells in total: start from the proportional counts rounded down, then keep
+    adding a cell to the axis with the widest cells while the budget allows it.
+    """
+    widths = np.asarray(widths, dtype=float)
+    resolution = (budget / np.prod(widths)) ** (1 / len(widths))
+    counts = np.maximum(1, np.floor(resolution * widths)).astype(int)
+    while np.prod(counts) > budget:
+        counts[np.argmax(counts)] -= 1
+    while True:
+        fits = [axis for axis in range(len(counts)) if np.prod(counts) // counts[axis] * (counts[axis] + 1) <= budget]
+        if not fits:
+            return counts
+        counts[max(fits, key=lambda axis: widths[axis] / counts[axis])] += 1
+
+
+def adaptive_grid_search(batch_cost_function, lower, upper, coarse_resolution=None, levels=4, keep=8,
+                         factor=3, chunk_size=1024):
+    """
+    Coarse-to-fine minimization of batch_cost_function over the box [lower, upper).
+
+    The box is first cut into a grid of cells, coarse_resolution per pi of width along
+    every axis (by default as many as fit in COARSE_POINTS cells), and each cell is
+    evaluated at its center. Then, levels times, the
+    keep best cells of the last level are cut into factor cells per axis (an odd factor
+    keeps the parent center as a child center, so it is not evaluated again) and only the
+    new centers are evaluated. Cells far from the best values are never refined, so the
+    evaluations grow with levels * keep * factor^d instead of resolution^d.
+
+    Returns (best_params, best_cost, points, values) with every evaluated point.
+    """
+    lower = np.asarray(lower, dtype=float)
+    upper = np.asarray(upper, dtype=float)
+    dimension = len(lower)
+    if coarse_resolution is None:
+        counts = _coarse_counts(upper - lower, COARSE_POINTS)
+    else:
+        counts = np.maximum(1, np.round(coarse_resolution * (upper - lower) / np.pi)).astype(int)
+    width = (upper - lower) / counts
+    centers = lower + (_cell_grid(counts) + 0.5) * width
+    values = _evaluate(batch_cost_function, centers, chunk_size)
+    all_points, all_values = [centers], [values]
+
+    offsets = (_cell_grid([factor] * dimension) - (factor - 1) / 2) / factor
+    if factor % 2:
+        offsets = offsets[np.any(offsets != 0, axis=1)]
+    for _ in range(levels):
+        best = np.argsort(values, kind="stable")[:keep]
+        parents, parent_values = centers[best], values[best]
+        children = (parents[:, None, :] + offsets[None, :, :] * width).reshape(-1, dimension)
+        child_values = _evaluate(batch_cost_function, children, chunk_size)
+        all_points.append(children)
+        all_values.append(child_values)
+        width = width / factor
+        centers, values = children, child_values
+        if factor % 2:
+            # The parent centers are also centers of cells of the new level
+            centers = np.concatenate([parents, children])
+            values = np.concatenate([parent_values, child_values])
+
+    points, values = np.concatenate(all_points), np.concatenate(all_values)
+    index = int(np.argmin(values))
+    return points[index], float(values[index]), points, values
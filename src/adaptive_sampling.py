@@ -0,0 +1,89 @@
+import numpy as np
+
+from sample_set import PackedCounts
+from simulator_session import get_simulator, run_counts
+
+
+def confidence_halfwidth(samples, per_value, z=1.96):
+    """Half-width of the normal confidence interval on the shot-weighted mean."""
+    return z * np.sqrt(samples.variance(per_value) / samples.shots)
+
+
+def mode_is_dominant(samples, z=1.96):
+    """
+    True once the most frequent bitstring is significantly ahead of the runner-up:
+    p1 - p2 exceeds z standard errors of the difference of two multinomial frequencies.
+    """
+    if len(samples.counts) < 2:
+        return samples.shots > 0
+    top = samples.top_k(2)
+    p1, p2 = samples.counts[top] / samples.shots
+    return p1 - p2 > z * np.sqrt((p1 + p2 - (p1 - p2) ** 2) / samples.shots)
+
+
+def sample_adaptively(circuit, evaluate=None, simulator=None, round_shots=256, max_shots=8192,
+                      target_halfwidth=None, z=1.96, stop_when_dominant=False):
+    """
+    Run a measured circuit in rounds of round_shots until the requested statistical
+    quality is reached or max_shots have been spent, and return the PackedCounts.
+
+    Stops when the confidence half-width of the mean of evaluate(samples) drops to
+    target_halfwidth, and/or (stop_when_dominant) when the most frequent bitstring
+    passes mode_is_dominant. evaluate maps PackedCounts to one value per bitstring.
+    """
+    n_qubits = circuit.num_clbits
+    if simulator is None:
+        simulator = get_simulator(n_qubits, circuit=circuit)
+
+    samples = None
+    while samples is None or samples.shots < max_shots:
+        shots = min(round_shots, max_shots - (samples.shots if samples else 0))
+        counts = run_counts(simulator, circuit, shots)
+        new = PackedCounts.from_counts(counts, n_qubits)
+        samples = new if samples is None else samples.merge(new)
+
+        if target_halfwidth is None and not stop_when_dominant:
+            continue
+        done = True
+        if target_halfwidth is not None:
+            done = evaluate is not None and confidence_halfwidth(samples, evaluate(samples), z) <= target_halfwidth
+        if stop_when_dominant:
+            done = done and mode_is_dominant(samples, z)
+        if done:
+            break
+    return samples
+
+
+def adaptive_grid_expectations(run_round, n_points, evaluate, round_shots=128, max_shots=1024,
+                               target_halfwidth=None, z=1.96):
+    """
+    Estimate the expectation at n_points parameter points while spending shots only where
+    they matter for finding the minimum.
+
+    Every round, run_round(indices, shots) must return one PackedCounts per requested
+    point. After each round a point keeps sampling only while its confidence interval
+    still overlaps the best upper bound (it could still be the minimum), it has not
+    reached target_halfwidth and it has fewer than max_shots.
+    Returns (means, halfwidths, shots) arrays over all points.
+    """
+    samples = [None] * n_points
+    means = np.zeros(n_points)
+    halfwidths = np.full(n_points, np.inf)
+    shots = np.zeros(n_points, dtype=np.int64)
+
+    active = np.arange(n_points)
+    while len(active):
+        for index, new in zip(active, run_round(active, round_shots)):
+            samples[index] = new if samples[index] is None else samples[index].merge(new)
+            values = evaluate(samples[index])
+            means[index] = samples[index].mean(values)
+            halfwidths[index] = confidence_halfwidth(samples[index], values, z)
+            shots[index] = samples[index].shots
+
+        best_upper = np.min(means + halfwidths)
+        keep = (means[active] - halfwidths[active] <= best_upper) & (shots[active] + round_shots <= max_shots)
+        if target_halfwidth is not None:
+            keep &= halfwidths[active] > target_halfwidth
+        active = active[keep]
+
+    return means, halfwidths, shots
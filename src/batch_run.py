@@ -0,0 +1,184 @@
+import argparse
+import glob
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from adaptive_grid import gamma_period
+from graph_io import read_graph
+from instrumentation import traced_call, merge, is_enabled
+from cost_hamiltonian import create_cost_hamiltonian_mwis
+from estimator_run import estimator_run_qaoa
+from exact_mwis import exact_mwis_for_file
+from noisy_simulation import NoisyEvaluator, get_noise_model
+from parameter_store import ParameterStore, graph_family, interp_parameters
+
+
+def corpus_files(folder="input", pattern="graph*_*.txt"):
+    """Instance files sorted by (size, index), e.g. graph5_1 ... graph20_30."""
+    def key(path):
+        return [int(x) for x in re.findall(r"\d+", os.path.basename(path))]
+
+    return sorted(glob.glob(os.path.join(folder, pattern)), key=key)
+
+
+def load_results(results_path):
+    """All result records from an append-only JSONL results file."""
+    if not os.path.exists(results_path):
+        return []
+    records = []
+    with open(results_path, "r") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                try:
+                    records.append(json.loads(line))
+                except json.JSONDecodeError:
+                    # A run interrupted mid-write leaves a truncated last line
+                    continue
+    return records
+
+
+def completed_keys(results_path):
+    return {(r["graph"], r["p"]) for r in load_results(results_path)}
+
+
+def run_instance(file_path, depths, method, initial_params_by_depth, noise=None):
+    """
+    Optimize every requested depth for one instance. Depth p + 1 starts from the INTERP
+    extrapolation of this instance's depth-p optimum unless the store supplied a start.
+    With noise = (single-qubit, two-qubit) depolarizing error rates, the noisy <C> at the
+    optimized angles is recorded as well. Returns one result record per depth.
+    """
+    timings = {}
+    start = time.perf_counter()
+    graph = read_graph(file_path)
+    timings["load"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    cost_mwis = create_cost_hamiltonian_mwis(graph)
+    period = gamma_period(cost_mwis)
+    timings["hamiltonian"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    # The BQM ground energy is minus the maximum independent set weight
+    best_energy = -exact_mwis_for_file(file_path)[1]
+    timings["exact"] = time.perf_counter() - start
+
+    n_qubits = len(graph)
+    records = []
+    previous = None
+    for p in depths:
+        initial_params = initial_params_by_depth.get(p)
+        if initial_params is None and previous is not None and len(previous[0]) == p - 1:
+            initial_params = np.concatenate(interp_parameters(*previous))
+
+        start = time.perf_counter()
+        beta, gamma, energy, result = estimator_run_qaoa(
+            n_qubits, p, cost_mwis, method=method, full_output=True, initial_params=initial_params)
+        optimize_time = time.perf_counter() - start
+        previous = (beta, gamma)
+
+        noisy = {}
+        if noise is not None:
+            start = time.perf_counter()
+            # Instances already run in parallel, so each evaluator stays in this process
+            evaluator = NoisyEvaluator(n_qubits, p, cost_mwis, get_noise_model(*noise), workers=1)
+            noisy_energy = evaluator.expectation(beta, gamma)
+            noisy = {"noise": list(noise), "noisy_energy": noisy_energy,
+                     "noisy_approximation_ratio": float(noisy_energy / best_energy) if best_energy else None,
+                     "noisy_time": time.perf_counter() - start}
+
+        records.append({
+            "graph": os.path.basename(file_path),
+            "family": graph_family(file_path),
+            "n_qubits": n_qubits,
+            "p": p,
+            "method": method,
+            "warm_start": initial_params is not None,
+            "beta": [float(x) for x in beta],
+            "gamma": [float(x) for x in gamma],
+            "gamma_period": period,
+            "energy": float(energy),
+            "best_energy": float(best_energy),
+            # Both energies are negative for a useful state; 1 means <C> hits the optimum
+            "approximation_ratio": float(energy / best_energy) if best_energy else None,
+            "nfev": int(result.nfev),
+            "timings": dict(timings, optimize=optimize_time),
+            **noisy,
+        })
+    return records
+
+
+def batch_run(files, depths, results_path="output/results.jsonl", method="COBYLA", workers=None,
+              store_path="output/parameter_store.json", noise=None):
+    """
+    Run every instance in a process pool and append one JSON line per (graph, p) to
+    results_path as soon as it finishes. Instances whose depths are all already in the
+    results file are skipped, so an interrupted run resumes where it stopped.
+    """
+    done = completed_keys(results_path)
+    pending = [f for f in files if any((os.path.basename(f), p) not in done for p in depths)]
+    print(f"{len(files) - len(pending)} of {len(files)} instances already completed")
+
+    store = ParameterStore(store_path) if store_path else None
+    folder = os.path.dirname(results_path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+
+    with ProcessPoolExecutor(max_workers=workers) as pool, open(results_path, "a") as out:
+        futures = {}
+        for file_path in pending:
+            initial = {}
+            if store is not None:
+                for p in depths:
+                    initial[p] = store.initial_params(graph_family(file_path), p)
+            futures[pool.submit(traced_call, is_enabled(), run_instance, file_path, depths, method, initial,
+                                noise)] = file_path
+
+        for future in as_completed(futures):
+            file_path = futures[future]
+            try:
+                records, report = future.result()
+            except Exception as exc:
+                print(f"{file_path} failed: {exc}")
+                continue
+            # Stages and counters of the worker, otherwise lost with its process
+            merge(report)
+            for record in records:
+                if (record["graph"], record["p"]) in done:
+                    continue
+                out.write(json.dumps(record) + "\n")
+                if store is not None:
+                    store.record(record["family"], record["p"], record["beta"], record["gamma"],
+                                 record["energy"], graph=record["graph"],
+                                 gamma_period=record.get("gamma_period"), save=False)
+            out.flush()
+            os.fsync(out.fileno())
+            if store is not None:
+                store.save()
+            print(f"{file_path}: " + ", ".join(
+                f"p={r['p']} ratio={r['approximation_ratio']:.4f}" for r in records))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run QAOA over every graph in the input corpus.")
+    parser.add_argument("--input", default="input")
+    parser.add_argument("--pattern", default="graph*_*.txt")
+    parser.add_argument("--depths", type=int, nargs="+", default=[1, 2])
+    parser.add_argument("--method", default="COBYLA")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--results", default="output/results.jsonl")
+    parser.add_argument("--store", default="output/parameter_store.json",
+                        help="parameter store for warm starts; empty string disables it")
+    parser.add_argument("--noise", type=float, nargs=2, metavar=("P1", "P2"),
+                        help="also record <C> at the optimum under depolarizing noise with these "
+                             "single- and two-qubit error rates")
+    args = parser.parse_args()
+
+    batch_run(corpus_files(args.input, args.pattern), args.depths, args.results, args.method,
+              args.workers, args.store or None, args.noise)
@@ -0,0 +1,197 @@
+import argparse
+import json
+import os
+import platform
+import time
+import tracemalloc
+from collections import defaultdict
+
+import numpy as np
+
+from batch_run import corpus_files
+from cost_hamiltonian import create_cost_hamiltonian_mwis, bqm_to_pauli_sumop
+from energy_histogram import compute_energy
+from estimator_run import estimator_run_qaoa, _cost_function_for
+from graph_io import read_graph
+from qaoa_circuit import qaoa_circuit
+
+BENCHMARK_DIR = "output/benchmarks"
+
+
+def time_call(function, repeat=5, min_time=0.05):
+    """
+    Per-call latency of function(): the call is looped until one sample takes at least
+    min_time, and the best and median of repeat samples are reported (in seconds).
+    """
+    start = time.perf_counter()
+    function()
+    elapsed = time.perf_counter() - start
+    number = max(1, int(min_time / elapsed)) if elapsed > 0 else 1000
+
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        samples.append((time.perf_counter() - start) / number)
+    return {"best": min(samples), "median": float(np.median(samples)), "number": number}
+
+
+def peak_memory(function):
+    """(result, peak bytes traced by tracemalloc) of one call; numpy buffers are included."""
+    tracemalloc.start()
+    try:
+        result = function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, peak
+
+
+def select_files(folder="input", sizes=(5, 10, 15, 20), instances=1):
+    """The first `instances` graphs of every size, e.g. graph5_1 ... graph20_1."""
+    by_size = defaultdict(list)
+    for path in corpus_files(folder, "graph[0-9]*_*.txt"):
+        size = int(os.path.basename(path)[len("graph"):].split("_")[0])
+        by_size[size].append(path)
+    return [path for size in sizes for path in by_size[size][:instances]]
+
+
+def benchmark_instance(file_path, engines, methods, depths, repeat=5, seed=0):
+    """
+    One record per measured case on one graph: latency of every hot path, and wall time,
+    evaluations to convergence and peak memory of a full optimization per
+    (engine, method, p).
+    """
+    name = os.path.basename(file_path)
+    G = read_graph(file_path)
+    n_qubits = len(G)
+    bqm = create_cost_hamiltonian_mwis(G)
+    rng = np.random.default_rng(seed)
+    bitstrings = ["".join(bits) for bits in rng.choice(["0", "1"], size=(256, n_qubits))]
+    betas, gammas = rng.uniform(0, np.pi, 1), rng.uniform(0, 2 * np.pi, 1)
+
+    cases = {
+        "read_graph": lambda: read_graph(file_path),
+        "create_cost_hamiltonian_mwis": lambda: create_cost_hamiltonian_mwis(G),
+        "bqm_to_pauli_sumop": lambda: bqm_to_pauli_sumop(bqm),
+        "qaoa_circuit": lambda: qaoa_circuit(betas, gammas, n_qubits, bqm),
+        # 256 bitstrings per call, as one batch of measured shots would be post-processed
+        "compute_energy": lambda: [compute_energy(b, G) for b in bitstrings],
+    }
+    records = []
+    for case, function in cases.items():
+        records.append(dict(graph=name, n_qubits=n_qubits, case=case, **time_call(function, repeat)))
+
+    for engine in engines:
+        for p in depths:
+            cost_function, args = _cost_function_for(n_qubits, p, bqm, engine)
+            params = np.concatenate([rng.uniform(0, np.pi, p), rng.uniform(0, 2 * np.pi, p)])
+            records.append(dict(graph=name, n_qubits=n_qubits, case=f"cost_function[{engine},p={p}]",
+                                **time_call(lambda: cost_function(params, *args), repeat)))
+
+            for method in methods:
+                def optimize():
+                    # Same random start for every run of this case
+                    np.random.seed(seed)
+                    return estimator_run_qaoa(n_qubits, p, bqm, engine=engine, method=method, full_output=True)
+
+                start = time.perf_counter()
+                try:
+                    _, _, energy, result = optimize()
+                except ValueError as exc:
+                    # e.g. a gradient-based method on an engine without gradients
+                    print(f"{name} {engine} {method} p={p}: skipped ({exc})")
+                    continue
+                wall_time = time.perf_counter() - start
+                # tracemalloc slows Python down, so memory is measured on a separate run
+                _, peak = peak_memory(optimize)
+                records.append(dict(graph=name, n_qubits=n_qubits,
+                                    case=f"optimize[{engine},{method},p={p}]",
+                                    wall_time=wall_time, peak_memory=peak,
+                                    nfev=int(result.nfev), energy=float(energy)))
+    return records
+
+
+def run_suite(files, engines=("statevector",), methods=("COBYLA",), depths=(1,), repeat=5):
+    return {
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "machine": {"python": platform.python_version(), "platform": platform.platform(),
+                    "cpus": os.cpu_count()},
+        "records": [record for file_path in files
+                    for record in benchmark_instance(file_path, engines, methods, depths, repeat)],
+    }
+
+
+def baseline_path(name, folder=BENCHMARK_DIR):
+    return os.path.join(folder, f"{name}.json")
+
+
+def save_baseline(results, name, folder=BENCHMARK_DIR):
+    os.makedirs(folder, exist_ok=True)
+    with open(baseline_path(name, folder), "w") as f:
+        json.dump(results, f, indent=2)
+
+
+def load_baseline(name, folder=BENCHMARK_DIR):
+    with open(baseline_path(name, folder), "r") as f:
+        return json.load(f)
+
+
+def _metric(record):
+    # Latency cases compare the best time, optimizations the wall time
+    return record["best"] if "best" in record else record["wall_time"]
+
+
+def compare(results, baseline, threshold=1.2):
+    """
+    Print current / baseline time per (graph, case) and return the keys that got slower
+    than threshold times the baseline (or needed more evaluations to converge).
+    """
+    previous = {(r["graph"], r["case"]): r for r in baseline["records"]}
+    regressions = []
+    for record in results["records"]:
+        key = (record["graph"], record["case"])
+        if key not in previous:
+            continue
+        ratio = _metric(record) / _metric(previous[key])
+        flag = ratio > threshold
+        if "nfev" in record and record["nfev"] > previous[key]["nfev"]:
+            flag = True
+        if flag:
+            regressions.append(key)
+        print(f"{'REGRESSION ' if flag else ''}{key[0]} {key[1]}: {ratio:.2f}x baseline")
+    return regressions
+
+
+def print_report(results):
+    for r in results["records"]:
+        if "best" in r:
+            print(f"{r['graph']:<16} {r['case']:<40} {r['best'] * 1e3:10.3f} ms")
+        else:
+            print(f"{r['graph']:<16} {r['case']:<40} {r['wall_time']:10.3f} s  "
+                  f"nfev={r['nfev']:<5} peak={r['peak_memory'] / 2 ** 20:.1f} MiB  energy={r['energy']:.4f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the QAOA hot paths over the graph corpus.")
+    parser.add_argument("--input", default="input")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[5, 10, 15, 20])
+    parser.add_argument("--instances", type=int, default=1, help="graphs per size")
+    parser.add_argument("--engines", nargs="+", default=["statevector"])
+    parser.add_argument("--methods", nargs="+", default=["COBYLA"])
+    parser.add_argument("--depths", type=int, nargs="+", default=[1])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--save", metavar="NAME", help="save the results as baseline NAME")
+    parser.add_argument("--compare", metavar="NAME", help="compare against baseline NAME")
+    parser.add_argument("--threshold", type=float, default=1.2)
+    args = parser.parse_args()
+
+    results = run_suite(select_files(args.input, args.sizes, args.instances),
+                        args.engines, args.methods, args.depths, args.repeat)
+    print_report(results)
+    if args.save:
+        save_baseline(results, args.save)
+    if args.compare:
+        regressions = compare(results, load_baseline(args.compare), args.threshold)
+        print(f"{len(regressions)} regression(s) against {args.compare}")
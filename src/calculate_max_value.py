@@ -1,17 +1,18 @@
-from qiskit_aer import AerSimulator
-from qaoa_circuit import qaoa_circuit
 import numpy as np
 from generate_chart import generate_distribution
+from energy_evaluator import get_evaluator
+from adaptive_sampling import sample_adaptively
+from simulator_session import get_simulator, qaoa_measured_circuit, run_counts
 
 
 def calculate_max_value(optimal_beta, optimal_gamma, cost_hamiltonian, G,
-                        output_file="output/best_mwis.txt"):
+                        output_file="output/best_mwis.txt", shots=1024, adaptive=False):
     with open(output_file, "w") as f:
         # Find optimal parameters (assuming minimization of expectation value)
         # optimal_indices = np.unravel_index(np.argmin(expectation_values), expectation_values.shape)
 
-        simulator = AerSimulator()
         n_qubits = len(G.nodes())
+        simulator = get_simulator(n_qubits)
 
         # Case 1: 4D expectation_values (two sets of beta and gamma)
         # if len(optimal_indices) == 4:
@@ -36,36 +37,32 @@ def calculate_max_value(optimal_beta, optimal_gamma, cost_hamiltonian, G,
         # else:
         #     raise ValueError("Unexpected number of indices in optimal_indices")
 
-        # Generate QAOA circuit with the optimal parameters
-        optimal_circuit = qaoa_circuit(optimal_beta, optimal_gamma, n_qubits, cost_hamiltonian)
-
-        # Measure all qubits and run the circuit
-        optimal_circuit.measure_all()
-        result = simulator.run(optimal_circuit, shots=1024).result()
-        counts = result.get_counts()
+        # Measured QAOA circuit with the optimal parameters, bound from the cached template
+        optimal_circuit = qaoa_measured_circuit(optimal_beta, optimal_gamma, n_qubits, cost_hamiltonian, simulator)
+        if adaptive:
+            # Sample in rounds and stop once the most frequent bitstring is significantly ahead
+            counts = sample_adaptively(optimal_circuit, simulator=simulator, max_shots=shots,
+                                       stop_when_dominant=True).to_dict()
+        else:
+            counts = run_counts(simulator, optimal_circuit, shots)
 
         # Choose the bitstring that appears most frequently
         best_bitstring = max(counts, key=counts.get)
         f.write(f"Best bitstring: {best_bitstring}\n")
 
-        def calculate_mwis_value(bitstring, graph, selected_bit):
+        evaluator = get_evaluator(G)
+
+        def calculate_mwis_value(bitstring, selected_bit):
             """
             Calculate the total weight for vertices selected (based on selected_bit) and
             return None if the independent set constraint is violated.
             """
-            total_weight = 0
-            for node in graph.nodes():
-                if bitstring[node] == selected_bit:
-                    total_weight += graph.nodes[node].get("weight", 1.0)
-            # Verify the independent set constraint:
-            for i, j in graph.edges():
-                if bitstring[i] == selected_bit and bitstring[j] == selected_bit:
-                    return None  # Invalid: adjacent vertices are both selected
-            return total_weight
+            value = evaluator.independent_set_weights(bitstring, selected_bit)[0]
+            return None if np.isnan(value) else float(value)
 
         # Compute total weights for both interpretations
-        value_for_0 = calculate_mwis_value(best_bitstring, G, '0')
-        value_for_1 = calculate_mwis_value(best_bitstring, G, '1')
+        value_for_0 = calculate_mwis_value(best_bitstring, '0')
+        value_for_1 = calculate_mwis_value(best_bitstring, '1')
 
         # Compare and choose the interpretation with the larger total weight
         if value_for_0 is None and value_for_1 is None:
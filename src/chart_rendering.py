@@ -0,0 +1,155 @@
+import atexit
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import matplotlib
+
+# Charts are only ever written to files, never shown
+matplotlib.use("Agg")
+import numpy as np
+from matplotlib.figure import Figure
+
+from instrumentation import stage
+
+# "background" renders on a worker thread, "sync" in the caller, "off" skips charts entirely
+RENDER_MODE = os.environ.get("QAOA_CHARTS", "background")
+DPI = 300
+# Bitstrings shown individually before the rest are lumped into an "other" bucket
+TOP_K = 16
+# Energy levels (or level bins) on the x axis of a stacked energy chart
+MAX_ENERGY_LEVELS = 60
+
+_executor = None
+_pending = []
+
+
+def render_chart(draw, filepath, *args, mode=None, dpi=DPI, figsize=(12, 6)):
+    """
+    Draw a chart with draw(fig, *args) on a new Figure and save it to filepath.
+    The Figure is used directly (not pyplot), so rendering is safe off the main thread.
+    Returns a Future in background mode, otherwise None.
+    """
+    mode = mode or RENDER_MODE
+    if mode == "off":
+        return None
+
+    def render():
+        with stage("render"):
+            folder = os.path.dirname(filepath)
+            if folder:
+                os.makedirs(folder, exist_ok=True)
+            fig = Figure(figsize=figsize)
+            draw(fig, *args)
+            fig.savefig(filepath, dpi=dpi, bbox_inches='tight')
+
+    if mode == "sync":
+        render()
+        return None
+
+    global _executor
+    if _executor is None:
+        # A single worker keeps charts in submission order and bounds memory
+        _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="charts")
+    future = _executor.submit(render)
+    _pending.append(future)
+    return future
+
+
+def wait_for_charts():
+    """Block until every chart submitted so far has been written; re-raises their errors."""
+    while _pending:
+        _pending.pop(0).result()
+
+
+atexit.register(wait_for_charts)
+
+
+def top_k_with_other(labels, counts, k=TOP_K):
+    """The k largest counts with their labels, followed by an "other" bucket for the rest."""
+    counts = np.asarray(counts)
+    if len(counts) <= k:
+        order = np.argsort(-counts, kind="stable")
+        return [labels[i] for i in order], counts[order]
+    order = np.argsort(-counts, kind="stable")[:k]
+    other = counts.sum() - counts[order].sum()
+    return [labels[i] for i in order] + ["other"], np.append(counts[order], other)
+
+
+def stacked_energy_fractions(samples, energy_values, k=TOP_K, max_levels=MAX_ENERGY_LEVELS):
+    """
+    Per energy level, the fraction of its shots taken by each of the k most frequent
+    bitstrings and by all others together. With more than max_levels distinct energies,
+    levels are equal-width energy bins labeled by their centers. Returns
+    (levels, labels, fractions) with fractions of shape (len(labels), len(levels)).
+    """
+    levels, level_index = np.unique(energy_values, return_inverse=True)
+    level_index = level_index.ravel()
+    if len(levels) > max_levels:
+        edges = np.linspace(levels[0], levels[-1], max_levels + 1)
+        level_index = np.clip(np.searchsorted(edges, energy_values, side="right") - 1, 0, max_levels - 1)
+        occupied = np.unique(level_index)
+        levels = ((edges[:-1] + edges[1:]) / 2)[occupied]
+        level_index = np.searchsorted(occupied, level_index)
+
+    top = samples.top_k(k)
+    series = np.full(len(samples.counts), len(top))
+    series[top] = np.arange(len(top))
+
+    totals = np.zeros((len(top) + 1, len(levels)))
+    np.add.at(totals, (series, level_index), samples.counts)
+    fractions = totals / totals.sum(axis=0)
+
+    labels = samples.bitstrings(top)
+    if fractions[-1].any():
+        labels.append("other")
+    else:
+        fractions = fractions[:-1]
+    return levels, labels, fractions
+
+
+def draw_heatmap(fig, expectation_values):
+    ax = fig.subplots()
+    image = ax.imshow(expectation_values, aspect='auto', origin='lower', extent=[0, 2, 0, 1], cmap='RdYlBu')
+    fig.colorbar(image, ax=ax, label=r"$\langle \beta, \gamma | C | \beta, \gamma \rangle$")
+    ax.set_xlabel(r"$\gamma / \pi$")
+    ax.set_ylabel(r"$\beta / \pi$")
+    ax.set_title("QAOA Cost Hamiltonian Expectation Values")
+
+
+def draw_distribution(fig, labels, frequencies, title, color=None):
+    ax = fig.subplots()
+    ax.bar(labels, frequencies, color=color, edgecolor='k' if color else None)
+    ax.set_xlabel("Bitstring")
+    ax.set_ylabel("Frequency")
+    ax.set_title(title)
+    ax.tick_params(axis='x', labelrotation=90)
+
+
+def draw_energy_histograms(fig, bin_edges, series):
+    """series: (label, color, bin counts, mean) per distribution, all over bin_edges."""
+    ax = fig.subplots()
+    for label, color, hist, _ in series:
+        ax.stairs(hist, bin_edges, fill=True, alpha=0.7, label=label, color=color)
+    for label, color, _, mean in series:
+        ax.axvline(mean, color=color, linestyle='--', linewidth=2, label=f'{label} Mean: {mean:.2f}')
+    ax.set_xlabel("Energy")
+    ax.set_ylabel("Frequency")
+    ax.legend()
+    ax.grid(True)
+
+
+def draw_stacked_energies(fig, levels, labels, fractions, title):
+    ax = fig.subplots()
+    x_positions = np.arange(len(levels))
+    bottoms = np.zeros(len(levels))
+    for label, row in zip(labels, fractions):
+        ax.bar(x_positions, row, 0.8, bottom=bottoms, label=label,
+               color='lightgray' if label == "other" else None)
+        bottoms += row
+    # Label at most ~30 levels so the axis stays readable
+    step = max(1, len(levels) // 30)
+    ax.set_xticks(x_positions[::step], [f"{level:.4g}" for level in levels[::step]], rotation=90)
+    ax.set_xlabel("Energy")
+    ax.set_ylabel("Fraction of Measurements")
+    ax.set_title(title)
+    ax.legend(bbox_to_anchor=(1.05, 1), loc='upper left', fontsize='xx-small')
@@ -1,12 +1,21 @@
-from itertools import product
+import hashlib
+import json
 
 import dimod
 import numpy as np
 from scipy.optimize import minimize
 from qiskit_aer import AerSimulator
-from src.qaoa_circuit import qaoa_circuit
-from qiskit.primitives import Estimator
-from cost_hamiltonian import bqm_to_pauli_sumop
+from qiskit.primitives import Estimator, StatevectorEstimator
+from qaoa_template import get_template
+from statevector_engine import (cost_vector, statevector_cost_function, statevector_batch_cost_function,
+                                statevector_cost_and_gradient, batch_chunk_size)
+from grid_sweep import sweep_grid_minimum
+from adaptive_grid import adaptive_grid_search, search_domain
+from landscape_store import LandscapeStore
+from ising_model import as_ising
+from instrumentation import stage, timed, count
+from light_cone import LightConeEvaluator, light_cone_cost_function, light_cone_batch_cost_function
+from noisy_simulation import NoisyEvaluator, get_noise_model, noisy_cost_function, noisy_batch_cost_function
 from qiskit_aer.noise import NoiseModel, depolarizing_error
 
 # noise_model = NoiseModel()
@@ -21,52 +30,169 @@ from qiskit_aer.noise import NoiseModel, depolarizing_error
 #
 # simulator = AerSimulator(noise_model=noise_model)
 estimator = Estimator()
+batch_estimator = StatevectorEstimator()
 def qaoa_cost_function(params, n_qubits, p, cost_mwis):
-    beta = params[:p]
-    gamma = params[p:]
-    qc = qaoa_circuit(beta, gamma, n_qubits, cost_mwis)
-    # Wrap input properly as a tuple
-    job = estimator.run([qc], [bqm_to_pauli_sumop(cost_mwis)])
-    results = job.result().values[0]
+    # Circuit and observable are built once per (BQM, p); each call only binds params
+    template = get_template(n_qubits, p, cost_mwis)
+    count("cost_evaluations")
+    with stage("estimator"):
+        job = estimator.run([template.circuit], [template.observable], [template.ordered_values(params)])
+        results = job.result().values[0]
 
     return results
-def estimator_run_qaoa(n_qubits, p, cost_mwis):
-    initial_beta = np.random.uniform(0, np.pi, p)
-    initial_gamma = np.random.uniform(0, 2 * np.pi, p)
-    initial_params = np.concatenate([initial_beta, initial_gamma])
 
+
+def qaoa_batch_cost_function(params_batch, n_qubits, p, cost_mwis):
+    # One PUB per chunk: the Estimator broadcasts the circuit over all parameter rows
+    template = get_template(n_qubits, p, cost_mwis)
+    count("cost_evaluations", len(params_batch))
+    with stage("estimator"):
+        job = batch_estimator.run([(template.circuit, template.observable,
+                                           template.parameter_values(params_batch))])
+        return job.result()[0].data.evs
+
+
+def _cost_function_for(n_qubits, p, cost_mwis, engine, noise_model=None):
+    # "statevector" precomputes the diagonal cost once and never builds a circuit;
+    # "estimator" goes through the Qiskit Estimator primitive on every evaluation;
+    # "lightcone" sums per-term light-cone simulations and scales to large sparse graphs;
+    # "noisy" simulates the circuit under noise_model (default: get_noise_model()).
+    if engine == "noisy":
+        return noisy_cost_function, (p, NoisyEvaluator(n_qubits, p, cost_mwis, noise_model or get_noise_model()))
+    if engine == "statevector":
+        return statevector_cost_function, (p, cost_vector(n_qubits, cost_mwis))
+    if engine == "lightcone":
+        return light_cone_cost_function, (p, LightConeEvaluator(cost_mwis, p))
+    if engine == "estimator":
+        return qaoa_cost_function, (n_qubits, p, cost_mwis)
+    raise ValueError(f"Unknown engine: {engine}")
+
+
+def _batch_cost_function_for(n_qubits, p, cost_mwis, engine, noise_model=None):
+    # Returns the batched cost function, its extra arguments and a default chunk size
+    if engine == "noisy":
+        evaluator = NoisyEvaluator(n_qubits, p, cost_mwis, noise_model or get_noise_model())
+        return noisy_batch_cost_function, (p, evaluator), 256
+    if engine == "statevector":
+        costs = cost_vector(n_qubits, cost_mwis)
+        return statevector_batch_cost_function, (p, costs), batch_chunk_size(costs)
+    if engine == "lightcone":
+        return light_cone_batch_cost_function, (p, LightConeEvaluator(cost_mwis, p)), 64
+    if engine == "estimator":
+        return qaoa_batch_cost_function, (n_qubits, p, cost_mwis), 1024
+    raise ValueError(f"Unknown engine: {engine}")
+
+
+# scipy methods that only use function values; every other method gets the adjoint gradient
+DERIVATIVE_FREE_METHODS = {'COBYLA', 'COBYQA', 'NELDER-MEAD', 'POWELL'}
+
+
+def _objective_for(n_qubits, p, cost_mwis, engine, method, noise_model=None):
+    # (function, args, jac) for scipy.optimize.minimize
+    if method.upper() in DERIVATIVE_FREE_METHODS:
+        cost_function, args = _cost_function_for(n_qubits, p, cost_mwis, engine, noise_model)
+        return cost_function, args, None
+    if engine == "statevector":
+        return statevector_cost_and_gradient, (p, cost_vector(n_qubits, cost_mwis)), True
+    raise ValueError(f"Gradient-based method {method} requires the statevector engine")
+
+
+@timed("optimize")
+def estimator_run_qaoa(n_qubits, p, cost_mwis, engine="statevector", method='COBYLA', full_output=False,
+                       initial_params=None, noise_model=None):
+    """
+    Optimize the 2p QAOA angles with scipy.optimize.minimize, starting from
+    initial_params ([betas, gammas], e.g. from a ParameterStore) or a random point.
+    Gradient-based methods (e.g. 'L-BFGS-B', 'BFGS') use the exact adjoint gradient of
+    the statevector engine. With full_output=True the scipy OptimizeResult is returned
+    as a fourth element, which reports the evaluation counts (nfev, njev).
+    engine="noisy" optimizes the noisy <C> under noise_model (see noisy_simulation).
+    """
+    if initial_params is None:
+        initial_beta = np.random.uniform(0, np.pi, p)
+        initial_gamma = np.random.uniform(0, 2 * np.pi, p)
+        initial_params = np.concatenate([initial_beta, initial_gamma])
+
+    cost_function, args, jac = _objective_for(n_qubits, p, cost_mwis, engine, method, noise_model)
     result = minimize(
-        qaoa_cost_function,
+        cost_function,
         initial_params,
-        args=(n_qubits, p, cost_mwis),
-        method='COBYLA',
+        args=args,
+        method=method,
+        jac=jac,
         tol=1e-4
     )
 
     optimal_beta = result.x[:p]
     optimal_gamma = result.x[p:]
 
+    if full_output:
+        return optimal_beta, optimal_gamma, result.fun, result
     return optimal_beta, optimal_gamma, result.fun
 
-def estimator_run_qaoa_grid(n_qubits, p, cost_mwis, grid_resolution):
+def _landscape_engine(engine, noise_model=None):
+    # Engine label of a stored landscape; noisy landscapes also depend on the noise model
+    if engine != "noisy":
+        return engine
+    noise = json.dumps((noise_model or get_noise_model()).to_dict(), default=str, sort_keys=True)
+    return f"noisy:{hashlib.sha1(noise.encode()).hexdigest()[:12]}"
+
+
+@timed("grid_search")
+def estimator_run_qaoa_grid(n_qubits, p, cost_mwis, grid_resolution, engine="statevector", chunk_size=None,
+                            noise_model=None, landscape_dir=None, full_output=False):
+    """
+    Minimum of <C> over the uniform grid of grid_resolution betas in [0, pi] and twice as
+    many gammas in [0, 2 pi] per layer. With landscape_dir, the whole landscape is kept
+    in a LandscapeStore there: an interrupted sweep resumes, a finished one is reused
+    without any evaluation, and full_output=True returns the store as a fourth element
+    (e.g. store.heatmap() for generate_heatmap).
+    """
     beta_range = np.linspace(0, np.pi, grid_resolution)
     gamma_range = np.linspace(0, 2 * np.pi, grid_resolution * 2 )
 
-    best_cost = float('inf')
-    best_beta = None
-    best_gamma = None
+    batch_cost_function, args, default_chunk_size = _batch_cost_function_for(n_qubits, p, cost_mwis, engine, noise_model)
+
+    if landscape_dir is not None:
+        store = LandscapeStore.open(beta_range, gamma_range, p, as_ising(cost_mwis).fingerprint(),
+                                    _landscape_engine(engine, noise_model), chunk_size or default_chunk_size,
+                                    landscape_dir)
+        store.fill(lambda params: batch_cost_function(params, *args))
+        best_beta, best_gamma, best_cost = store.minimum()
+        if full_output:
+            return best_beta, best_gamma, best_cost, store
+        return best_beta, best_gamma, best_cost
 
-    # Create a grid over all beta and gamma combinations
-    beta_grid = list(product(beta_range, repeat=p))
-    gamma_grid = list(product(gamma_range, repeat=p))
+    # Stream the beta/gamma grid in chunks, one batched call per chunk
+    return sweep_grid_minimum(
+        lambda params: batch_cost_function(params, *args),
+        beta_range,
+        gamma_range,
+        p,
+        chunk_size or default_chunk_size
+    )
 
-    for beta in beta_grid:
-        for gamma in gamma_grid:
-            params = np.concatenate([beta, gamma])
-            cost = qaoa_cost_function(params, n_qubits, p, cost_mwis)
-            if cost < best_cost:
-                best_cost = cost
-                best_beta = beta
-                best_gamma = gamma
 
-    return np.array(best_beta), np.array(best_gamma), best_cost
+@timed("grid_search")
+def estimator_run_qaoa_adaptive_grid(n_qubits, p, cost_mwis, coarse_resolution=None, levels=4, keep=8,
+                                     engine="statevector", chunk_size=None, noise_model=None, full_output=False):
+    """
+    Grid search that refines only around the best cells (see adaptive_grid_search), over
+    the smallest angle box allowed by the periods and the time-reversal symmetry of <C>
+    (see search_domain). With full_output=True the evaluated (points, values) are
+    returned as a fourth element.
+    """
+    batch_cost_function, args, default_chunk_size = _batch_cost_function_for(n_qubits, p, cost_mwis, engine, noise_model)
+    lower, upper = search_domain(cost_mwis, p)
+    best_params, best_cost, points, values = adaptive_grid_search(
+        lambda params: batch_cost_function(params, *args),
+        lower,
+        upper,
+        coarse_resolution,
+        levels,
+        keep,
+        chunk_size=chunk_size or default_chunk_size
+    )
+    if full_output:
+        return best_params[:p], best_params[p:], best_cost, (points, values)
+    return best_params[:p], best_params[p:], best_cost
@@ -1,65 +1,41 @@
-import matplotlib.pyplot as plt
 import os
 
-from qiskit.primitives import Estimator
-from qiskit_aer import AerSimulator
-
-from src.qaoa_circuit import qaoa_circuit
+from adaptive_sampling import sample_adaptively
+from simulator_session import get_simulator, qaoa_measured_circuit, run_counts
+from chart_rendering import render_chart, draw_heatmap, draw_distribution, top_k_with_other, TOP_K
 
 
 def generate_heatmap(expectation_values, folder="output/graph", filename="heatmap.png"):
-    # Ensure the folder exists
-    os.makedirs(folder, exist_ok=True)
-    # Full path to save the file
-    filepath = os.path.join(folder, filename)
-    # Generate the heatmap and save it
-    plt.figure(figsize=(16, 8))
-    plt.xlabel(r"$\gamma / \pi$")
-    plt.ylabel(r"$\beta / \pi$")
-    plt.imshow(expectation_values, aspect='auto', origin='lower',
-               extent=[0, 2, 0, 1], cmap='RdYlBu')
-    plt.colorbar(label=r"$\langle \beta, \gamma | C | \beta, \gamma \rangle$")
-    plt.title("QAOA Cost Hamiltonian Expectation Values")
-    plt.savefig(filepath, dpi=300, bbox_inches='tight')
-    plt.close()
+    # Rendered by chart_rendering (in the background by default)
+    return render_chart(draw_heatmap, os.path.join(folder, filename), expectation_values, figsize=(16, 8))
 
-def generate_distribution(counts,filename, folder="output/graph"):
-    os.makedirs(folder, exist_ok=True)
-    filepath = os.path.join(folder, filename)
 
-    plt.figure(figsize=(12, 6))
-    plt.bar(counts.keys(), counts.values())
-    plt.xlabel("Bitstring")
-    plt.ylabel("Frequency")
-    plt.title("Measurement Outcomes for the Optimal QAOA Circuit")
-    plt.xticks(rotation=90)
-    plt.savefig(filepath, dpi=300, bbox_inches='tight')
-    plt.close()
+def generate_distribution(counts, filename, folder="output/graph", top_k=TOP_K):
+    # Only the top_k most frequent bitstrings get a bar; the rest share one "other" bar
+    labels, frequencies = top_k_with_other(list(counts.keys()), list(counts.values()), top_k)
+    return render_chart(draw_distribution, os.path.join(folder, filename), labels, frequencies,
+                        "Measurement Outcomes for the Optimal QAOA Circuit")
 
 
-def draw_bitstring_distribution(n_qubits, optimal_beta, optimal_gamma, cost_hamiltonian, shots=1024):
-    # Initialize the simulator.
-    simulator = AerSimulator()
+def draw_bitstring_distribution(n_qubits, optimal_beta, optimal_gamma, cost_hamiltonian, shots=1024, adaptive=False,
+                                folder="output/graph", filename="bitstring_distribution.png", top_k=TOP_K):
+    # Shared simulator for this process.
+    simulator = get_simulator(n_qubits)
 
-    # Build the QAOA circuit using optimal parameters.
-    qc = qaoa_circuit(optimal_beta, optimal_gamma, n_qubits, cost_hamiltonian)
-    qc.measure_all()  # Append measurement to all qubits.
+    # Bind the optimal parameters into the cached, measured QAOA circuit.
+    qc = qaoa_measured_circuit(optimal_beta, optimal_gamma, n_qubits, cost_hamiltonian, simulator)
 
-    # Execute the circuit on the simulator.
-    result = simulator.run(qc, shots=shots).result()
-    counts = result.get_counts()
+    # Execute the circuit on the simulator; in adaptive mode shots are spent in rounds only
+    # until the most frequent bitstring is significantly ahead (at most `shots`).
+    if adaptive:
+        counts = sample_adaptively(qc, simulator=simulator, max_shots=shots, stop_when_dominant=True).to_dict()
+    else:
+        counts = run_counts(simulator, qc, shots)
 
-    # Plot the measurement distribution as a bar chart.
-    plt.figure(figsize=(10, 6))
-    bitstrings = list(counts.keys())
-    frequencies = list(counts.values())
     max_bitstring = max(counts, key=counts.get)
     print("Bitstring with maximum frequency:", max_bitstring, "with count:", counts[max_bitstring])
 
-    plt.bar(bitstrings, frequencies, color='blue', edgecolor='k')
-    plt.xlabel("Bitstring")
-    plt.ylabel("Frequency")
-    plt.title("Bitstring Distribution")
-    plt.xticks(rotation=90)
-    plt.tight_layout()
-    plt.show()
\ No newline at end of file
+    # Save the measurement distribution (top_k bitstrings plus "other") as a bar chart
+    labels, frequencies = top_k_with_other(list(counts.keys()), list(counts.values()), top_k)
+    render_chart(draw_distribution, os.path.join(folder, filename), labels, frequencies,
+                 "Bitstring Distribution", 'blue', figsize=(10, 6))
@@ -1,6 +1,8 @@
 import networkx as nx
 import random
 
+from graph_io import build_dataset
+
 n = [5, 10, 15, 20]
 
 for i in n:
@@ -25,3 +27,6 @@ for i in n:
             file.write(str(weights) + "\n")
             file.write("\nEdge List:\n")
             file.write(str(list(graph.edges())))
+
+# Pack all generated instances into one memory-mappable dataset (see graph_io.GraphDataset)
+build_dataset([f"input/graph{i}_{j + 1}.txt" for i in n for j in range(30)], "input/dataset")
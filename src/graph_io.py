@@ -0,0 +1,115 @@
+import json
+import os
+import re
+
+import networkx as nx
+import numpy as np
+
+from instrumentation import timed
+
+_NUMBER = re.compile(r"[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?")
+
+
+def parse_graph_file(file_path):
+    """
+    Parse a graph file written by generate_graph.py straight into arrays.
+    Returns (weights, edges): weights has one entry per vertex and edges is an
+    (m, 2) int64 array with u < v, deduplicated and sorted.
+    """
+    with open(file_path, 'r') as f:
+        lines = f.readlines()
+
+    vertex_weights = None
+    edge_list = None
+    for i, line in enumerate(lines):
+        line = line.strip()
+        if line.startswith("Vertex Weights Array:"):
+            vertex_weights = _NUMBER.findall(lines[i + 1])
+        elif line.startswith("Edge List:"):
+            edge_list = re.findall(r"\d+", lines[i + 1])
+
+    if vertex_weights is None or edge_list is None:
+        raise ValueError("Graph file format is incorrect. Expected both vertex weights and edge list.")
+
+    weights = np.array(vertex_weights, dtype=float)
+    if np.all(weights == np.round(weights)):
+        weights = weights.astype(np.int64)
+
+    edges = np.array(edge_list, dtype=np.int64).reshape(-1, 2)
+    if len(edges):
+        # Undirected: store each edge once as (min, max)
+        edges = np.unique(np.sort(edges, axis=1), axis=0)
+    return weights, edges
+
+
+def to_csr(n_nodes, edges):
+    """Symmetric CSR adjacency (indptr, indices) of an undirected edge array."""
+    both = np.concatenate([edges, edges[:, ::-1]])
+    order = np.lexsort((both[:, 1], both[:, 0]))
+    both = both[order]
+    indptr = np.zeros(n_nodes + 1, dtype=np.int64)
+    np.add.at(indptr, both[:, 0] + 1, 1)
+    return np.cumsum(indptr), both[:, 1]
+
+
+def to_networkx(weights, edges):
+    """NetworkX graph with nodes 0..n-1 carrying 'weight', built without a dense matrix."""
+    graph = nx.Graph()
+    graph.add_nodes_from((i, {'weight': weight}) for i, weight in enumerate(weights.tolist()))
+    graph.add_edges_from(edges.tolist(), weight=1)
+    return graph
+
+
+@timed("load_graph")
+def read_graph(file_path):
+    return to_networkx(*parse_graph_file(file_path))
+
+
+def build_dataset(files, path):
+    """
+    Pack many graph files into one dataset directory of flat .npy arrays (concatenated
+    weights and edges plus offsets) that GraphDataset memory-maps.
+    """
+    parsed = [parse_graph_file(f) for f in files]
+    os.makedirs(path, exist_ok=True)
+    node_offsets = np.cumsum([0] + [len(w) for w, _ in parsed])
+    edge_offsets = np.cumsum([0] + [len(e) for _, e in parsed])
+    np.save(os.path.join(path, "weights.npy"),
+            np.concatenate([w for w, _ in parsed]) if parsed else np.zeros(0))
+    np.save(os.path.join(path, "edges.npy"),
+            np.concatenate([e for _, e in parsed]).astype(np.int32) if parsed else np.zeros((0, 2), np.int32))
+    np.save(os.path.join(path, "node_offsets.npy"), node_offsets)
+    np.save(os.path.join(path, "edge_offsets.npy"), edge_offsets)
+    with open(os.path.join(path, "names.json"), "w") as f:
+        json.dump([os.path.basename(file) for file in files], f)
+
+
+class GraphDataset:
+    """
+    Memory-mapped dataset written by build_dataset. Instances are loaded by index or
+    file name; only the slices of the requested instance are read from disk.
+    """
+
+    def __init__(self, path):
+        self.weights = np.load(os.path.join(path, "weights.npy"), mmap_mode='r')
+        self.edges = np.load(os.path.join(path, "edges.npy"), mmap_mode='r')
+        self.node_offsets = np.load(os.path.join(path, "node_offsets.npy"))
+        self.edge_offsets = np.load(os.path.join(path, "edge_offsets.npy"))
+        with open(os.path.join(path, "names.json"), "r") as f:
+            self.names = json.load(f)
+        self._index = {name: i for i, name in enumerate(self.names)}
+
+    def __len__(self):
+        return len(self.names)
+
+    def index(self, name):
+        return self._index[os.path.basename(name)]
+
+    def arrays(self, i):
+        """(weights, edges) of instance i."""
+        weights = np.asarray(self.weights[self.node_offsets[i]:self.node_offsets[i + 1]])
+        edges = np.asarray(self.edges[self.edge_offsets[i]:self.edge_offsets[i + 1]], dtype=np.int64)
+        return weights, edges
+
+    def graph(self, i):
+        return to_networkx(*self.arrays(i))
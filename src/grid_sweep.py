@@ -0,0 +1,46 @@
+import math
+
+import numpy as np
+
+
+def grid_shape(beta_range, gamma_range, p):
+    """Shape of the grid beta_range^p x gamma_range^p, betas first."""
+    return (len(beta_range),) * p + (len(gamma_range),) * p
+
+
+def grid_points(beta_range, gamma_range, p, start, stop):
+    """[betas, gammas] rows of the flat grid indices start..stop-1 (C order over grid_shape)."""
+    beta_range = np.asarray(beta_range, dtype=float)
+    gamma_range = np.asarray(gamma_range, dtype=float)
+    indices = np.unravel_index(np.arange(start, stop), grid_shape(beta_range, gamma_range, p))
+    columns = [beta_range[i] for i in indices[:p]] + [gamma_range[i] for i in indices[p:]]
+    return np.column_stack(columns)
+
+
+def iter_grid_chunks(beta_range, gamma_range, p, chunk_size):
+    """
+    Stream the grid beta_range^p x gamma_range^p as (chunk, 2p) arrays of
+    [betas, gammas] rows, in the same order as nested product() loops over the betas
+    and then the gammas, without materializing the whole Cartesian product.
+    """
+    total = math.prod(grid_shape(beta_range, gamma_range, p))
+    for start in range(0, total, chunk_size):
+        yield grid_points(beta_range, gamma_range, p, start, min(start + chunk_size, total))
+
+
+def sweep_grid_minimum(batch_cost_function, beta_range, gamma_range, p, chunk_size):
+    """
+    Evaluate batch_cost_function on every chunk of the grid and keep the running minimum.
+    Returns (best_beta, best_gamma, best_cost); ties keep the first point in grid order.
+    """
+    best_cost = float('inf')
+    best_params = None
+
+    for params in iter_grid_chunks(beta_range, gamma_range, p, chunk_size):
+        costs = np.asarray(batch_cost_function(params))
+        index = int(np.argmin(costs))
+        if costs[index] < best_cost:
+            best_cost = costs[index]
+            best_params = params[index]
+
+    return np.array(best_params[:p]), np.array(best_params[p:]), best_cost
@@ -0,0 +1,117 @@
+import hashlib
+import os
+
+from qiskit import qpy, transpile
+from qiskit.providers.fake_provider import GenericBackendV2
+from qiskit.transpiler import CouplingMap
+from qiskit_ibm_runtime import fake_provider
+
+from instrumentation import stage
+from qaoa_template import get_template
+
+# Transpiled circuits are kept per (problem, p, schedule, backend) in memory and as QPY files
+CACHE_DIR = "output/transpile_cache"
+# Upper bound on the nodes visited while looking for a line of qubits in a coupling map
+MAX_PATH_SEARCH = 100000
+
+_backends = {}
+_transpiled = {}
+
+
+def get_fake_backend(name="FakeSherbrooke", n_qubits=None):
+    """
+    Local fake backend, built once per (name, n_qubits): "linear" is a line of n_qubits
+    qubits with an IBM-like basis, any other name is a class of
+    qiskit_ibm_runtime.fake_provider (e.g. "FakeSherbrooke", a 127-qubit heavy-hex device).
+    """
+    key = (name, n_qubits)
+    if key not in _backends:
+        if name == "linear":
+            _backends[key] = GenericBackendV2(n_qubits, basis_gates=["cx", "id", "rz", "sx", "x"],
+                                              coupling_map=CouplingMap.from_line(n_qubits), seed=0)
+        else:
+            _backends[key] = getattr(fake_provider, name)()
+    return _backends[key]
+
+
+def line_path(coupling_map, length):
+    """
+    Physical qubits forming a simple path of the given length in the coupling map, or None.
+    Depth-first search that tries the neighbour with the fewest free neighbours first
+    (Warnsdorff's rule), which walks heavy-hex lattices along their long rows.
+    """
+    graph = coupling_map.graph.to_undirected(multigraph=False)
+    neighbours = {node: sorted(graph.neighbors(node)) for node in graph.node_indices()}
+    visited = 0
+    for start in sorted(neighbours, key=lambda node: len(neighbours[node])):
+        path, on_path = [start], {start}
+
+        def candidates(node):
+            free = lambda other: sum(n not in on_path for n in neighbours[other])
+            return iter(sorted(neighbours[node], key=free))
+
+        stack = [candidates(start)]
+        while stack:
+            if len(path) == length:
+                return path
+            visited += 1
+            if visited > MAX_PATH_SEARCH:
+                return None
+            step = next((node for node in stack[-1] if node not in on_path), None)
+            if step is None:
+                stack.pop()
+                on_path.discard(path.pop())
+                continue
+            path.append(step)
+            on_path.add(step)
+            stack.append(candidates(step))
+    return None
+
+
+def backend_key(backend):
+    """Digest of what transpilation depends on: the coupling map and the native gates."""
+    edges = sorted({tuple(sorted(edge)) for edge in backend.coupling_map.get_edges()})
+    digest = hashlib.sha1(repr((backend.num_qubits, edges, sorted(backend.operation_names))).encode())
+    return digest.hexdigest()
+
+
+def hardware_circuit(n_qubits, p, bqm, backend, schedule=None, measure=True, optimization_level=1,
+                     cache_dir=CACHE_DIR):
+    """
+    Parameterized QAOA circuit transpiled for backend, transpiled once per (problem, p,
+    schedule, coupling map) and reused across processes through QPY files in cache_dir
+    (None keeps the cache in memory only); each call only costs a lookup.
+
+    By default the cost layer is a swap network laid along a line of physical qubits when
+    the coupling map has one (linear and heavy-hex devices do), so routing adds no swaps,
+    and an edge-colored layer otherwise.
+    """
+    path = line_path(backend.coupling_map, n_qubits)
+    if schedule is None:
+        schedule = "swap_network" if path is not None else "coloring"
+    template = get_template(n_qubits, p, bqm, schedule)
+    key = (template.fingerprint, p, schedule, measure, optimization_level, backend_key(backend))
+    if key in _transpiled:
+        return _transpiled[key]
+
+    filepath = None
+    if cache_dir is not None:
+        name = hashlib.sha1(repr(key).encode()).hexdigest()
+        filepath = os.path.join(cache_dir, f"{name}.qpy")
+    if filepath is not None and os.path.exists(filepath):
+        with open(filepath, "rb") as f:
+            _transpiled[key] = qpy.load(f)[0]
+        return _transpiled[key]
+
+    circuit = template.measured_circuit if measure else template.circuit
+    # The swap network is already routed for a line, so it is placed on one as is
+    initial_layout = path if schedule == "swap_network" else None
+    with stage("transpile"):
+        transpiled = transpile(circuit, backend, initial_layout=initial_layout,
+                               optimization_level=optimization_level, seed_transpiler=0)
+    if filepath is not None:
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(filepath, "wb") as f:
+            qpy.dump(transpiled, f)
+    _transpiled[key] = transpiled
+    return transpiled
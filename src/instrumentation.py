@@ -0,0 +1,191 @@
+import atexit
+import functools
+import json
+import multiprocessing
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+# Set QAOA_TRACE=path to enable instrumentation for a whole run and write the trace there
+TRACE_ENV = "QAOA_TRACE"
+# Individual events kept for the trace; totals and counters are always complete
+MAX_TRACE_EVENTS = 100000
+
+_enabled = False
+_origin = time.perf_counter()
+_events = []
+_totals = defaultdict(lambda: [0, 0.0])
+_counters = defaultdict(int)
+_lock = threading.Lock()
+_local = threading.local()
+
+
+class _NullStage:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+def enable():
+    global _enabled
+    _enabled = True
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def is_enabled():
+    return _enabled
+
+
+def reset():
+    global _origin
+    with _lock:
+        _origin = time.perf_counter()
+        _events.clear()
+        _totals.clear()
+        _counters.clear()
+
+
+@contextmanager
+def _record(name):
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    stack.append(name)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        end = time.perf_counter()
+        stack.pop()
+        with _lock:
+            total = _totals[name]
+            total[0] += 1
+            total[1] += end - start
+            if len(_events) < MAX_TRACE_EVENTS:
+                _events.append((name, start - _origin, end - start, os.getpid(), threading.get_ident(), len(stack)))
+
+
+def stage(name):
+    """
+    Context manager timing one pipeline stage, e.g. `with stage("sampling"): ...`.
+    Stages nest; when instrumentation is disabled this returns a shared no-op object.
+    """
+    if not _enabled:
+        return _NULL_STAGE
+    return _record(name)
+
+
+def timed(name=None):
+    """Decorator timing every call of a function as stage `name` (default: its name)."""
+    def decorator(function):
+        label = name or function.__name__
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return function(*args, **kwargs)
+            with _record(label):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def count(name, amount=1):
+    """Add amount to counter name (e.g. cost-function evaluations, shots)."""
+    if _enabled:
+        with _lock:
+            _counters[name] += int(amount)
+
+
+def summary():
+    """{"stages": {name: {calls, total, mean}}, "counters": {name: value}}, in seconds."""
+    with _lock:
+        stages = {name: {"calls": calls, "total": total, "mean": total / calls}
+                  for name, (calls, total) in _totals.items()}
+        return {"stages": stages, "counters": dict(_counters)}
+
+
+def traced_call(enabled, function, *args, **kwargs):
+    """
+    Run function in a pool worker with instrumentation on when the parent has it on
+    (pass is_enabled()), and return (result, report), where report holds the stages,
+    counters and events of this call only, for merge() in the parent (None when off).
+    """
+    if not enabled:
+        return function(*args, **kwargs), None
+    enable()
+    reset()
+    result = function(*args, **kwargs)
+    with _lock:
+        report = {"origin": _origin, "totals": {name: list(total) for name, total in _totals.items()},
+                  "counters": dict(_counters), "events": list(_events)}
+    return result, report
+
+
+def merge(report):
+    """Add the report of a traced_call in a worker to this process's totals, counters and events."""
+    if report is None:
+        return
+    # perf_counter is a system-wide monotonic clock, so only the origins differ
+    shift = report["origin"] - _origin
+    with _lock:
+        for name, (calls, total) in report["totals"].items():
+            _totals[name][0] += calls
+            _totals[name][1] += total
+        for name, value in report["counters"].items():
+            _counters[name] += value
+        room = MAX_TRACE_EVENTS - len(_events)
+        _events.extend((name, start + shift, duration, pid, tid, depth)
+                       for name, start, duration, pid, tid, depth in report["events"][:max(room, 0)])
+
+
+def print_summary():
+    report = summary()
+    print(f"{'stage':<28} {'calls':>8} {'total s':>10} {'mean ms':>10}")
+    for name, s in sorted(report["stages"].items(), key=lambda item: -item[1]["total"]):
+        print(f"{name:<28} {s['calls']:>8} {s['total']:>10.3f} {s['mean'] * 1e3:>10.3f}")
+    for name, value in sorted(report["counters"].items()):
+        print(f"{name:<28} {value:>8}")
+
+
+def write_trace(path):
+    """
+    Write the run as JSON: the summary plus one complete event per stage call in the
+    Chrome trace format ("traceEvents"), so it also opens in chrome://tracing or Perfetto.
+    """
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    with _lock:
+        events = [{"name": name, "ph": "X", "ts": start * 1e6, "dur": duration * 1e6,
+                   "pid": pid, "tid": tid, "args": {"depth": depth}}
+                  for name, start, duration, pid, tid, depth in _events]
+    trace = dict(summary(), traceEvents=events)
+    with open(path, "w") as f:
+        json.dump(trace, f)
+
+
+def _write_trace_at_exit(path):
+    if multiprocessing.parent_process() is not None:
+        return
+    write_trace(path)
+    print_summary()
+
+
+# Only the main process writes the trace: pool workers inherit QAOA_TRACE, but their
+# records reach the parent through traced_call and merge. A spawned worker imports this
+# module before parent_process() is set, but after it has been given its own name.
+if os.environ.get(TRACE_ENV) and multiprocessing.current_process().name == "MainProcess":
+    enable()
+    atexit.register(_write_trace_at_exit, os.environ[TRACE_ENV])
@@ -0,0 +1,144 @@
+import hashlib
+
+import dimod
+import numpy as np
+from qiskit.quantum_info import PauliList, SparsePauliOp
+
+
+class IsingModel:
+    """
+    Ising cost function C = offset + sum_i h[i] Z_i + sum_k J[k] Z_u Z_v with
+    (u, v) = edges[k], stored as flat arrays. Qubit i is variable i, as in qaoa_circuit.
+
+    It is the common representation behind the Pauli operator, the QAOA circuit and the
+    cost vector: every conversion reads the arrays directly instead of walking the dicts
+    of a dimod BQM or the NetworkX graph.
+    """
+
+    def __init__(self, h, edges, J, offset=0.0):
+        self.h = np.asarray(h, dtype=float)
+        self.edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+        self.J = np.asarray(J, dtype=float)
+        self.offset = float(offset)
+
+    @property
+    def n_qubits(self):
+        return len(self.h)
+
+    @classmethod
+    def mwis(cls, weights, edges):
+        """
+        MWIS cost Hamiltonian of create_cost_hamiltonian_mwis from a weight per vertex and
+        an (m, 2) edge array: h_i = -w_i/2 + A/4 * deg(i), J = A/4 on every edge and
+        offset = -sum(w)/2 + m A/4, with the penalty A the largest w_u + w_v over the edges.
+        """
+        weights = np.asarray(weights, dtype=float)
+        edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+        penalty = mwis_penalty(weights, edges)
+        degree = np.bincount(edges.ravel(), minlength=len(weights))
+        h = -weights / 2 + penalty / 4 * degree
+        J = np.full(len(edges), penalty / 4)
+        offset = -weights.sum() / 2 + len(edges) * penalty / 4
+        return cls(h, edges, J, offset)
+
+    @classmethod
+    def from_graph(cls, G):
+        """MWIS model of a graph with nodes 0..n-1 carrying an optional 'weight' (default 1)."""
+        return cls.mwis(*graph_arrays(G))
+
+    @classmethod
+    def from_bqm(cls, bqm):
+        """From a SPIN-valued dimod BQM whose variables are 0..n-1."""
+        linear, (row, col, biases), offset, labels = bqm.spin.to_numpy_vectors(return_labels=True)
+        labels = np.asarray(labels, dtype=np.int64)
+        h = np.zeros(len(labels))
+        h[labels] = linear
+        return cls(h, np.column_stack([labels[row], labels[col]]), biases, offset)
+
+    def fingerprint(self):
+        """Hex digest of the arrays, equal for equal models (used as a cache key)."""
+        digest = hashlib.sha1()
+        for array in (self.h, self.edges, self.J, np.array([self.offset])):
+            digest.update(np.ascontiguousarray(array).tobytes())
+        return digest.hexdigest()
+
+    def to_bqm(self):
+        return dimod.BinaryQuadraticModel.from_numpy_vectors(
+            self.h, (self.edges[:, 0], self.edges[:, 1], self.J), self.offset, dimod.SPIN,
+            variable_order=range(self.n_qubits))
+
+    def to_sparse_pauli_op(self):
+        """
+        SparsePauliOp of C (one Z term per qubit, one ZZ term per edge, then the offset),
+        written straight into the symplectic Z table instead of going through labels.
+        """
+        n, m = self.n_qubits, len(self.J)
+        has_offset = self.offset != 0
+        z = np.zeros((n + m + has_offset, n), dtype=bool)
+        z[np.arange(n), np.arange(n)] = True
+        rows = n + np.arange(m)
+        z[rows, self.edges[:, 0]] = True
+        z[rows, self.edges[:, 1]] = True
+        coeffs = np.concatenate([self.h, self.J, [self.offset] if has_offset else []])
+        return SparsePauliOp(PauliList.from_symplectic(z, np.zeros_like(z)), coeffs, copy=False)
+
+    def cost_vector(self, n_qubits=None):
+        """
+        C on every basis state |k>, with qubit i as bit i of k and bit 0 meaning Z = +1.
+
+        Every term is added in place from the bits b of k, since z_u = 1 - 2 b_u and
+        z_u z_v = 1 - 2 (b_u xor b_v): besides the result only one integer and one float
+        scratch vector of 2^n entries are held, never one row per qubit.
+        """
+        n_qubits = n_qubits or self.n_qubits
+        index = np.arange(2 ** n_qubits, dtype=np.int64)
+        bit = np.empty_like(index)
+        term = np.empty(2 ** n_qubits)
+        costs = np.full(2 ** n_qubits, self.offset + self.h.sum() + self.J.sum())
+
+        # Each term is a bit b of k (b_i, or b_u xor b_v for an edge) and adds coeff * (1 - 2 b)
+        terms = [((i,), coeff) for i, coeff in enumerate(self.h.tolist())]
+        terms += [(tuple(sorted(edge)), coeff) for edge, coeff in zip(self.edges.tolist(), self.J.tolist())]
+        for qubits, coeff in terms:
+            if len(qubits) == 1:
+                np.right_shift(index, qubits[0], out=bit)
+            else:
+                u, v = qubits
+                # bit u of k xor (k >> (v - u)) is b_u xor b_v
+                np.right_shift(index, v - u, out=bit)
+                np.bitwise_xor(bit, index, out=bit)
+                np.right_shift(bit, u, out=bit)
+            np.bitwise_and(bit, 1, out=bit)
+            np.multiply(bit, 2 * coeff, out=term)
+            costs -= term
+        return costs
+
+    def energies(self, bits):
+        """C for a (shots, n) 0/1 array of samples (column i is qubit i)."""
+        z = 1 - 2 * np.asarray(bits, dtype=np.int64)
+        return self.offset + z @ self.h + (z[:, self.edges[:, 0]] * z[:, self.edges[:, 1]]) @ self.J
+
+
+def graph_arrays(G):
+    """(weights, edges) of a graph with nodes 0..n-1 and an optional 'weight' (default 1)."""
+    weights = np.ones(G.number_of_nodes())
+    for node, weight in G.nodes(data="weight", default=1.0):
+        weights[node] = weight
+    edges = np.fromiter((x for edge in G.edges() for x in edge), dtype=np.int64,
+                        count=2 * G.number_of_edges()).reshape(-1, 2)
+    return weights, edges
+
+
+def mwis_penalty(weights, edges):
+    """MWIS penalty A: the largest w_u + w_v over the edges (0 without edges)."""
+    return float(np.max(weights[edges[:, 0]] + weights[edges[:, 1]])) if len(edges) else 0.0
+
+
+def as_ising(model):
+    """IsingModel view of either an IsingModel or a dimod BQM."""
+    return model if isinstance(model, IsingModel) else IsingModel.from_bqm(model)
+
+
+def as_bqm(model):
+    """dimod BQM of either an IsingModel or a dimod BQM."""
+    return model.to_bqm() if isinstance(model, IsingModel) else model
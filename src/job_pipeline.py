@@ -0,0 +1,130 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import numpy as np
+from qiskit_ibm_runtime import SamplerV2 as Sampler
+
+from instrumentation import stage, count
+from sample_set import PackedCounts
+
+# Jobs submitted but not yet post-processed; bounds both queue usage and memory
+MAX_IN_FLIGHT = 4
+# Parameter points per sampler job when a grid is split into jobs
+POINTS_PER_JOB = 64
+
+
+class LocalRuntimeSampler:
+    """
+    Offline stand-in for a runtime SamplerV2: runs on an Aer simulator through the
+    runtime's local mode (so job.result() blocks while run() returns at once) and delays
+    every result by queue_latency seconds after submission, like a queued device job.
+    """
+
+    def __init__(self, simulator, queue_latency=0.0):
+        self.sampler = Sampler(mode=simulator)
+        self.queue_latency = queue_latency
+
+    def run(self, pubs, shots=None):
+        return _QueuedJob(self.sampler.run(pubs, shots=shots), self.queue_latency)
+
+
+class _QueuedJob:
+    def __init__(self, job, queue_latency):
+        self.job = job
+        self.ready_at = time.monotonic() + queue_latency
+
+    def done(self):
+        return time.monotonic() >= self.ready_at and self.job.done()
+
+    def result(self):
+        time.sleep(max(0.0, self.ready_at - time.monotonic()))
+        return self.job.result()
+
+
+def _collect(job, task, postprocess):
+    # Worker thread: wait for one job and post-process its result there
+    result = job.result()
+    if postprocess is None:
+        return task, result
+    with stage("postprocess"):
+        return task, postprocess(task, result)
+
+
+def stream_jobs(submit, tasks, postprocess=None, max_in_flight=MAX_IN_FLIGHT):
+    """
+    Submit one job per task with submit(task) and yield (task, postprocess(task, result))
+    in completion order. At most max_in_flight jobs are in flight at any time: waiting
+    for a result and post-processing it happen on a worker thread, so the next job is
+    built and submitted while earlier ones still run or sit in a queue.
+    """
+    with ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="jobs") as pool:
+        pending = set()
+        for task in tasks:
+            if len(pending) >= max_in_flight:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+            with stage("submit"):
+                job = submit(task)
+            pending.add(pool.submit(_collect, job, task, postprocess))
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+
+
+def _point_chunks(n_points, points_per_job):
+    return [(start, min(start + points_per_job, n_points)) for start in range(0, n_points, points_per_job)]
+
+
+def _pub(circuit, points, parameters):
+    # Rows of points bind to parameters by name when given, else in circuit.parameters order
+    return (circuit, points if parameters is None else {tuple(parameters): points})
+
+
+def _unpack(result):
+    meas = result[0].data.meas
+    count("shots", meas.num_shots * meas.size)
+    return [PackedCounts.from_bit_array(meas[k]) for k in range(meas.size)]
+
+
+def sample_points(sampler, circuit, points, shots=None, points_per_job=POINTS_PER_JOB,
+                  max_in_flight=MAX_IN_FLIGHT, parameters=None):
+    """
+    PackedCounts of the measured circuit at every row of points, in order. parameters
+    (e.g. QAOATemplate.parameters) names the circuit parameter of each column.
+    """
+    points = np.asarray(points, dtype=float)
+    samples = [None] * len(points)
+    chunks = _point_chunks(len(points), points_per_job)
+    with stage("sampling"):
+        for (start, stop), chunk_samples in stream_jobs(
+                lambda chunk: sampler.run([_pub(circuit, points[chunk[0]:chunk[1]], parameters)], shots=shots),
+                chunks, lambda chunk, result: _unpack(result), max_in_flight):
+            samples[start:stop] = chunk_samples
+    return samples
+
+
+def sample_grid(sampler, circuit, parameter_grid, evaluate, shots=None, points_per_job=POINTS_PER_JOB,
+                max_in_flight=MAX_IN_FLIGHT, parameters=None):
+    """
+    Mean of evaluate(samples) (one value per distinct bitstring) at every point of a
+    (..., n_parameters) grid, returned with the grid's leading shape. The grid is split
+    into jobs of points_per_job points, and each job is reduced to its means as soon as
+    it completes, so only the counts of the jobs in flight are held at once. parameters
+    is as in sample_points.
+    """
+    points = np.asarray(parameter_grid, dtype=float)
+    shape = points.shape[:-1]
+    points = points.reshape(-1, points.shape[-1])
+    means = np.zeros(len(points))
+
+    def reduce(chunk, result):
+        return [samples.mean(evaluate(samples)) for samples in _unpack(result)]
+
+    with stage("sampling"):
+        for (start, stop), chunk_means in stream_jobs(
+                lambda chunk: sampler.run([_pub(circuit, points[chunk[0]:chunk[1]], parameters)], shots=shots),
+                _point_chunks(len(points), points_per_job), reduce, max_in_flight):
+            means[start:stop] = chunk_means
+    return means.reshape(shape)
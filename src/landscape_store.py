@@ -0,0 +1,115 @@
+import hashlib
+import json
+import math
+import os
+
+import numpy as np
+from numpy.lib.format import open_memmap
+
+from grid_sweep import grid_shape, grid_points
+
+# Landscapes are kept per (graph, engine, p, axes) under this folder and reused across runs
+LANDSCAPE_DIR = "output/landscapes"
+# Flat grid points read at a time when scanning a stored landscape
+SCAN_BLOCK = 1 << 20
+
+
+class LandscapeStore:
+    """
+    <C> over the grid beta_range^p x gamma_range^p, kept on disk in one folder:
+      - values.npy: memory-mapped float64 array of shape grid_shape(...) (betas first);
+      - done.npy: one flag per chunk of chunk_size flat grid points;
+      - meta.json: p, axes, graph fingerprint, engine and chunking.
+    Chunks are written in grid order and flagged only after their values are flushed,
+    so a sweep that is interrupted resumes at the first chunk without a flag. Only the
+    chunk being computed is held in memory, whatever the size of the grid.
+    """
+
+    def __init__(self, path, beta_range, gamma_range, p, fingerprint, engine, chunk_size):
+        self.path = path
+        self.p = p
+        self.beta_range = np.asarray(beta_range, dtype=float)
+        self.gamma_range = np.asarray(gamma_range, dtype=float)
+        self.shape = grid_shape(self.beta_range, self.gamma_range, p)
+        self.size = math.prod(self.shape)
+        meta = {"p": p, "beta_range": self.beta_range.tolist(), "gamma_range": self.gamma_range.tolist(),
+                "graph": fingerprint, "engine": engine, "chunk_size": int(chunk_size)}
+
+        meta_path = os.path.join(path, "meta.json")
+        if os.path.exists(meta_path):
+            with open(meta_path, "r") as f:
+                stored = json.load(f)
+            # The chunking of an existing store is kept, everything else must match
+            meta["chunk_size"] = stored["chunk_size"]
+            if stored != meta:
+                raise ValueError(f"Landscape at {path} was computed for a different grid, graph or engine")
+            self.values = open_memmap(os.path.join(path, "values.npy"), mode="r+")
+            self.done = open_memmap(os.path.join(path, "done.npy"), mode="r+")
+        else:
+            os.makedirs(path, exist_ok=True)
+            self.values = open_memmap(os.path.join(path, "values.npy"), mode="w+", dtype=np.float64,
+                                      shape=self.shape)
+            n_chunks = -(-self.size // meta["chunk_size"])
+            self.done = open_memmap(os.path.join(path, "done.npy"), mode="w+", dtype=bool, shape=(n_chunks,))
+            # Written last: a folder without meta.json is an incomplete creation and is redone
+            with open(meta_path, "w") as f:
+                json.dump(meta, f)
+        self.chunk_size = meta["chunk_size"]
+        self._flat = self.values.reshape(-1)
+
+    @classmethod
+    def open(cls, beta_range, gamma_range, p, fingerprint, engine, chunk_size, folder=LANDSCAPE_DIR):
+        """Store for these axes, graph and engine under folder, created on first use."""
+        key = repr((fingerprint, engine, p, np.asarray(beta_range, dtype=float).tobytes(),
+                    np.asarray(gamma_range, dtype=float).tobytes()))
+        name = hashlib.sha1(key.encode()).hexdigest()[:16]
+        return cls(os.path.join(folder, f"p{p}_{name}"), beta_range, gamma_range, p, fingerprint, engine,
+                   chunk_size)
+
+    @property
+    def complete(self):
+        return bool(self.done.all())
+
+    def pending_chunks(self):
+        """(index, start, stop) of every chunk still to be computed."""
+        for index in np.flatnonzero(~self.done).tolist():
+            start = index * self.chunk_size
+            yield index, start, min(start + self.chunk_size, self.size)
+
+    def fill(self, batch_cost_function):
+        """Compute every pending chunk with batch_cost_function([betas, gammas] rows)."""
+        for index, start, stop in self.pending_chunks():
+            params = grid_points(self.beta_range, self.gamma_range, self.p, start, stop)
+            self._flat[start:stop] = np.asarray(batch_cost_function(params), dtype=float)
+            self.values.flush()
+            self.done[index] = True
+            self.done.flush()
+        return self
+
+    def minimum(self):
+        """(best_beta, best_gamma, best_cost) of the complete landscape, first in grid order on ties."""
+        if not self.complete:
+            raise ValueError(f"Landscape at {self.path} is not complete")
+        best_index, best_cost = 0, np.inf
+        for start in range(0, self.size, SCAN_BLOCK):
+            block = self._flat[start:start + SCAN_BLOCK]
+            index = int(np.argmin(block))
+            if block[index] < best_cost:
+                best_index, best_cost = start + index, float(block[index])
+        params = grid_points(self.beta_range, self.gamma_range, self.p, best_index, best_index + 1)[0]
+        return params[:self.p], params[self.p:], best_cost
+
+    def heatmap(self, layer=0, at=None):
+        """
+        2-D (beta, gamma) slice of layer `layer` for generate_heatmap, with the angles of
+        the other layers fixed at the grid indices `at` ([beta indices, gamma indices] of
+        all layers; default: those of the minimum). Only the slice is read from disk.
+        """
+        if at is None:
+            best_beta, best_gamma, _ = self.minimum()
+            at = [int(np.argmin(np.abs(self.beta_range - b))) for b in best_beta] + \
+                 [int(np.argmin(np.abs(self.gamma_range - g))) for g in best_gamma]
+        index = list(at)
+        index[layer] = slice(None)
+        index[self.p + layer] = slice(None)
+        return np.array(self.values[tuple(index)])
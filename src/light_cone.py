@@ -0,0 +1,119 @@
+import networkx as nx
+import numpy as np
+from networkx.algorithms.graph_hashing import weisfeiler_lehman_graph_hash
+
+from instrumentation import count
+from ising_model import IsingModel, as_bqm
+from statevector_engine import qaoa_state
+
+# Largest light cone simulated as a statevector
+MAX_LIGHT_CONE_QUBITS = 24
+
+
+def _interaction_graph(bqm):
+    graph = nx.Graph()
+    graph.add_nodes_from(bqm.variables)
+    graph.add_edges_from((u, v) for (u, v), coeff in bqm.quadratic.items() if coeff)
+    return graph
+
+
+def _label(value):
+    return repr(round(float(value), 12))
+
+
+class _LightCone:
+    """One isomorphism class of term light cones: the sub-BQM as arrays, roots first."""
+
+    def __init__(self, graph, order):
+        self.graph = graph
+        self.n_qubits = len(order)
+        index = {node: i for i, node in enumerate(order)}
+        h = [graph.nodes[node]["h"] for node in order]
+        edges = [(index[u], index[v]) for u, v in graph.edges()]
+        J = [data["J"] for _, _, data in graph.edges(data=True)]
+        self.costs = IsingModel(h, edges, J).cost_vector()
+
+        # The roots are qubit 0, or qubits 0 and 1: the observable is Z_0 or Z_0 Z_1
+        n_roots = sum(1 for node in order if graph.nodes[node]["root"])
+        parity = np.arange(2 ** self.n_qubits, dtype=np.int64)
+        if n_roots == 2:
+            parity ^= parity >> 1
+        parity &= 1
+        parity *= -2
+        parity += 1
+        self.observable = parity.astype(np.int8)
+        self.coefficient = 0.0
+
+    def expectation(self, betas, gammas):
+        state = qaoa_state(betas, gammas, self.costs)
+        return float(np.dot(np.abs(state) ** 2, self.observable))
+
+
+class LightConeEvaluator:
+    """
+    <C> of the depth-p QAOA circuit from qaoa_circuit, assembled term by term.
+
+    A Z_i or Z_iZ_j term at depth p only sees the qubits within p hops of its support, so
+    it is simulated on that light-cone subgraph (with the original fields and couplings)
+    instead of the full register. Light cones are grouped once, at construction, into
+    classes of isomorphic subgraphs with equal weights, so each evaluation simulates one
+    representative per class. Cost scales with the number of distinct neighborhoods, not
+    with the number of qubits.
+    """
+
+    def __init__(self, bqm, p, max_qubits=MAX_LIGHT_CONE_QUBITS):
+        bqm = as_bqm(bqm)
+        self.p = p
+        self.offset = float(bqm.offset)
+        self.classes = []
+        interaction = _interaction_graph(bqm)
+        buckets = {}
+
+        terms = [((u,), h) for u, h in bqm.linear.items() if h]
+        terms += [((u, v), j) for (u, v), j in bqm.quadratic.items() if j]
+        for roots, coeff in terms:
+            cone = set()
+            for root in roots:
+                cone.update(nx.single_source_shortest_path_length(interaction, root, cutoff=p))
+            if len(cone) > max_qubits:
+                raise ValueError(f"Light cone of {roots} has {len(cone)} qubits (limit {max_qubits}).")
+
+            graph = nx.Graph()
+            for node in cone:
+                graph.add_node(node, h=bqm.linear[node], root=node in roots,
+                               label=f"{node in roots}:{_label(bqm.linear[node])}")
+            for u, v in interaction.subgraph(cone).edges():
+                j = bqm.quadratic[(u, v)]
+                graph.add_edge(u, v, J=j, label=_label(j))
+
+            light_cone = self._find_class(buckets, graph, roots)
+            light_cone.coefficient += coeff
+
+    def _find_class(self, buckets, graph, roots):
+        key = weisfeiler_lehman_graph_hash(graph, node_attr="label", edge_attr="label")
+        bucket = buckets.setdefault(key, [])
+        for light_cone in bucket:
+            # The hash can collide, so confirm with an exact weighted isomorphism test
+            if nx.is_isomorphic(light_cone.graph, graph,
+                                node_match=lambda a, b: a["label"] == b["label"],
+                                edge_match=lambda a, b: a["label"] == b["label"]):
+                return light_cone
+        order = list(roots) + sorted(node for node in graph if node not in roots)
+        light_cone = _LightCone(graph, order)
+        bucket.append(light_cone)
+        self.classes.append(light_cone)
+        return light_cone
+
+    def expectation(self, betas, gammas):
+        return self.offset + sum(light_cone.coefficient * light_cone.expectation(betas, gammas)
+                                 for light_cone in self.classes)
+
+
+def light_cone_cost_function(params, p, evaluator):
+    """Same interface as statevector_cost_function, for a LightConeEvaluator."""
+    count("cost_evaluations")
+    return evaluator.expectation(params[:p], params[p:])
+
+
+def light_cone_batch_cost_function(params_batch, p, evaluator):
+    return np.array([light_cone_cost_function(params, p, evaluator) for params in params_batch])
@@ -0,0 +1,187 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+from scipy.optimize import minimize
+from scipy.stats import qmc
+
+from estimator_run import _objective_for, _batch_cost_function_for
+from grid_sweep import iter_grid_chunks
+from instrumentation import timed, traced_call, merge, is_enabled
+
+# Grid points evaluated to seed the "grid" strategy (spread over the 2p dimensions)
+GRID_SEED_POINTS = 4096
+# Decimals of the angles that identify a point in the evaluation cache
+CACHE_DECIMALS = 10
+# New cache entries a worker collects before writing them to the shared cache in one call
+CACHE_FLUSH = 32
+
+# Worker state, set once per process by _init_worker
+_shared_best = None
+_shared_cache = None
+# Points this worker has evaluated itself, checked before the shared cache
+_local_cache = {}
+
+
+class _Pruned(Exception):
+    pass
+
+
+def _scale(unit_points, p):
+    """Map points of [0, 1)^2p to betas in [0, pi) and gammas in [0, 2 pi)."""
+    return unit_points * np.concatenate([np.full(p, np.pi), np.full(p, 2 * np.pi)])
+
+
+def initial_points(n_starts, p, strategy="latin", seed=None, n_qubits=None, cost_mwis=None, engine="statevector",
+                   noise_model=None):
+    """
+    n_starts starting points ([betas, gammas] rows):
+      - "random": uniform over the angle box, as estimator_run_qaoa draws one start;
+      - "latin": a Latin hypercube, so every beta and gamma range is covered evenly;
+      - "grid": the n_starts best points of a coarse grid sweep (needs the problem, and
+        the noise model for the noisy engine).
+    """
+    rng = np.random.default_rng(seed)
+    if strategy == "random":
+        return _scale(rng.random((n_starts, 2 * p)), p)
+    if strategy == "latin":
+        return _scale(qmc.LatinHypercube(d=2 * p, seed=rng).random(n_starts), p)
+    if strategy == "grid":
+        if cost_mwis is None:
+            raise ValueError("The grid strategy needs n_qubits and cost_mwis")
+        resolution = max(2, int(round(GRID_SEED_POINTS ** (1 / (2 * p)))))
+        # endpoint=False: beta = pi and gamma = 2 pi repeat the first row of the grid
+        beta_range = np.linspace(0, np.pi, resolution, endpoint=False)
+        gamma_range = np.linspace(0, 2 * np.pi, resolution, endpoint=False)
+        batch_cost_function, args, chunk_size = _batch_cost_function_for(n_qubits, p, cost_mwis, engine,
+                                                                         noise_model)
+        points, values = [], []
+        for params in iter_grid_chunks(beta_range, gamma_range, p, chunk_size):
+            points.append(params)
+            values.append(np.asarray(batch_cost_function(params, *args)))
+        points, values = np.concatenate(points), np.concatenate(values)
+        return points[np.argsort(values, kind="stable")[:n_starts]]
+    raise ValueError(f"Unknown start strategy: {strategy}")
+
+
+def _init_worker(shared_best, shared_cache):
+    global _shared_best, _shared_cache
+    _shared_best = shared_best
+    _shared_cache = shared_cache
+    _local_cache.clear()
+
+
+def _run_start(index, initial_params, n_qubits, p, cost_mwis, engine, method, noise_model,
+               prune_after, prune_gap):
+    """
+    One optimization from initial_params. Evaluations are memoized in the worker and,
+    when a shared cache is given, looked up there too (new entries are written to it in
+    batches), and after prune_after evaluations the start is abandoned as soon as its best
+    value is worse than the best of all starts by more than prune_gap.
+    """
+    cost_function, args, jac = _objective_for(n_qubits, p, cost_mwis, engine, method, noise_model)
+    state = {"nfev": 0, "cache_hits": 0, "best": np.inf, "best_x": np.asarray(initial_params, dtype=float)}
+    pending = {}
+
+    def flush():
+        if _shared_cache is not None and pending:
+            _shared_cache.update(pending)
+        pending.clear()
+
+    def objective(params):
+        key = tuple(np.round(params, CACHE_DECIMALS))
+        value = _local_cache.get(key)
+        if value is None and _shared_cache is not None:
+            value = _shared_cache.get(key)
+        if value is None:
+            value = cost_function(params, *args)
+            pending[key] = value
+            if len(pending) >= CACHE_FLUSH:
+                flush()
+        else:
+            state["cache_hits"] += 1
+        _local_cache[key] = value
+        state["nfev"] += 1
+
+        energy = value[0] if jac else value
+        if energy < state["best"]:
+            state["best"], state["best_x"] = float(energy), np.array(params, dtype=float)
+            with _shared_best.get_lock():
+                if energy < _shared_best.value:
+                    _shared_best.value = float(energy)
+        if state["nfev"] >= prune_after:
+            if state["best"] > _shared_best.value + prune_gap:
+                raise _Pruned()
+        return value
+
+    pruned = False
+    try:
+        result = minimize(objective, initial_params, method=method, jac=jac, tol=1e-4)
+        x, fun = result.x, float(result.fun)
+    except _Pruned:
+        pruned = True
+        x, fun = state["best_x"], state["best"]
+    flush()
+    return {"start": index, "initial": [float(v) for v in initial_params], "x": [float(v) for v in x],
+            "energy": fun, "nfev": state["nfev"], "cache_hits": state["cache_hits"], "pruned": pruned}
+
+
+@timed("multi_start")
+def multi_start_qaoa(n_qubits, p, cost_mwis, n_starts=8, strategy="latin", engine="statevector", method='COBYLA',
+                     workers=None, prune_after=20, prune_margin=0.5, share_cache=False, noise_model=None, seed=None):
+    """
+    Optimize the QAOA angles from n_starts starting points concurrently in a process pool
+    (see initial_points for the strategies). The starts share the best energy found so far
+    and, with share_cache, a cache of evaluated points (only worth it when starts are
+    likely to revisit the same angles, e.g. grid-seeded starts). After prune_after evaluations a
+    start is pruned once it trails the best energy by more than prune_margin standard
+    deviations of the cost over the starting points (prune_margin=None disables pruning).
+
+    Returns (best_beta, best_gamma, best_energy, summary) where summary holds the spread of
+    the final energies over the starts that were not pruned and one record per start.
+    """
+    starts = initial_points(n_starts, p, strategy, seed, n_qubits, cost_mwis, engine, noise_model)
+    if prune_margin is None:
+        prune_after, prune_gap = np.inf, 0.0
+    else:
+        # The spread of the cost over the starts sets the energy scale of "clearly losing"
+        batch_cost_function, args, _ = _batch_cost_function_for(n_qubits, p, cost_mwis, engine, noise_model)
+        prune_gap = prune_margin * float(np.std(batch_cost_function(starts, *args)))
+
+    # Spawned workers: the parent may hold Aer/OpenMP threads, which do not survive fork()
+    context = multiprocessing.get_context("spawn")
+    shared_best = context.Value("d", np.inf)
+    manager = context.Manager() if share_cache else None
+    try:
+        shared_cache = manager.dict() if manager else None
+        with ProcessPoolExecutor(max_workers=workers or min(len(starts), os.cpu_count() or 1),
+                                 mp_context=context, initializer=_init_worker,
+                                 initargs=(shared_best, shared_cache)) as pool:
+            futures = [pool.submit(traced_call, is_enabled(), _run_start, i, start, n_qubits, p, cost_mwis, engine,
+                                   method, noise_model, prune_after, prune_gap)
+                       for i, start in enumerate(starts)]
+            runs = []
+            for future in as_completed(futures):
+                run, report = future.result()
+                merge(report)
+                runs.append(run)
+            runs.sort(key=lambda run: run["start"])
+    finally:
+        if manager is not None:
+            manager.shutdown()
+
+    best = min(runs, key=lambda run: run["energy"])
+    finished = np.array([run["energy"] for run in runs if not run["pruned"]])
+    summary = {
+        "energies": finished.tolist(),
+        "mean": float(finished.mean()) if len(finished) else None,
+        "std": float(finished.std()) if len(finished) else None,
+        "worst": float(finished.max()) if len(finished) else None,
+        "pruned": sum(run["pruned"] for run in runs),
+        "nfev": sum(run["nfev"] for run in runs),
+        "cache_hits": sum(run["cache_hits"] for run in runs),
+        "runs": runs,
+    }
+    x = np.array(best["x"])
+    return x[:p], x[p:], best["energy"], summary
@@ -0,0 +1,140 @@
+import networkx as nx
+import numpy as np
+
+from cost_hamiltonian import create_cost_hamiltonian_mwis
+from estimator_run import estimator_run_qaoa
+from simulator_session import run_qaoa_counts
+from statevector_engine import cost_vector, qaoa_state
+
+# Largest kernel optimized with the statevector engine, which holds several 2^n vectors
+# and evaluates them many times per optimization; larger kernels use the light cones
+MAX_STATEVECTOR_KERNEL_NODES = 20
+# Samples drawn from the optimized circuit of a kernel too large for a statevector
+KERNEL_SHOTS = 1024
+
+
+def _weight(G, node):
+    return G.nodes[node].get("weight", 1.0)
+
+
+def _closed_neighborhood(G, node):
+    return set(G.adj[node]) | {node}
+
+
+def _is_clique(G, nodes):
+    nodes = list(nodes)
+    return all(G.has_edge(a, b) for i, a in enumerate(nodes) for b in nodes[i + 1:])
+
+
+class MWISReduction:
+    """
+    Result of reduce_mwis: the vertices fixed into the solution by the reduction rules
+    and the residual kernels, one per connected component, relabeled 0..k-1 so that
+    each can be turned into a Hamiltonian and a circuit on k qubits.
+    """
+
+    def __init__(self, included, kernels):
+        self.included = included
+        # List of (kernel graph, original node of each kernel node)
+        self.kernels = kernels
+
+    def lift(self, kernel_solutions):
+        """
+        Independent set of the original graph from one selected-node list per kernel
+        (in kernel labels), in the same order as self.kernels.
+        """
+        selected = set(self.included)
+        for (_, original), solution in zip(self.kernels, kernel_solutions):
+            selected.update(original[node] for node in solution)
+        return sorted(selected)
+
+
+def reduce_mwis(G):
+    """
+    Apply exact MWIS reduction rules until none fires, then split what is left into
+    connected components:
+      - isolated vertex: always take it;
+      - simplicial vertex (its neighborhood is a clique) at least as heavy as every
+        neighbor: take it and delete its neighbors;
+      - weighted domination: for adjacent u, v with N[v] contained in N[u] and
+        w(u) <= w(v), some optimum avoids u, so delete u.
+    """
+    H = G.copy()
+    included = []
+
+    changed = True
+    while changed:
+        changed = False
+        for v in sorted(H.nodes(), key=lambda node: -_weight(H, node)):
+            if v not in H:
+                continue
+            neighbors = list(H.adj[v])
+            if not neighbors or (_is_clique(H, neighbors)
+                                 and all(_weight(H, v) >= _weight(H, u) for u in neighbors)):
+                included.append(v)
+                H.remove_nodes_from(neighbors + [v])
+                changed = True
+
+        for u, v in list(H.edges()):
+            if u not in H or v not in H:
+                continue
+            for dominating, dominated in ((u, v), (v, u)):
+                if (_closed_neighborhood(H, dominated) <= _closed_neighborhood(H, dominating)
+                        and _weight(H, dominating) <= _weight(H, dominated)):
+                    H.remove_node(dominating)
+                    changed = True
+                    break
+
+    kernels = []
+    for component in nx.connected_components(H):
+        original = sorted(component)
+        kernel = nx.convert_node_labels_to_integers(H.subgraph(original).copy(), ordering="sorted")
+        kernels.append((kernel, original))
+    return MWISReduction(included, kernels)
+
+
+def _repair_independent_set(G, selected):
+    """Drop the lighter endpoint of every violated edge until the set is independent."""
+    selected = set(selected)
+    for u, v in sorted(G.edges(), key=lambda e: -max(_weight(G, e[0]), _weight(G, e[1]))):
+        if u in selected and v in selected:
+            selected.discard(u if _weight(G, u) < _weight(G, v) else v)
+    return sorted(selected)
+
+
+def qaoa_kernel_solver(kernel, p=1, method='COBYLA', shots=KERNEL_SHOTS):
+    """
+    Solve one kernel with QAOA: optimize the angles, take the most probable bitstring
+    (bit 0 selects a vertex) and repair it into an independent set. Returns
+    (selected kernel nodes, engine). Up to MAX_STATEVECTOR_KERNEL_NODES the angles are
+    optimized on the statevector and the bitstring read from it ("statevector"); larger
+    kernels are optimized term by term on their light cones and the bitstring is the
+    most frequent of shots samples ("lightcone"), so the cost stays bounded by the size
+    of the light cones (LightConeEvaluator raises if one is too large).
+    """
+    n_qubits = len(kernel)
+    cost_mwis = create_cost_hamiltonian_mwis(kernel)
+    if n_qubits <= MAX_STATEVECTOR_KERNEL_NODES:
+        engine = "statevector"
+        beta, gamma, _ = estimator_run_qaoa(n_qubits, p, cost_mwis, method=method)
+        state = qaoa_state(beta, gamma, cost_vector(n_qubits, cost_mwis))
+        best = int(np.argmax(np.abs(state) ** 2))
+    else:
+        engine = "lightcone"
+        beta, gamma, _ = estimator_run_qaoa(n_qubits, p, cost_mwis, engine=engine, method=method)
+        counts = run_qaoa_counts(beta, gamma, n_qubits, cost_mwis, shots=shots)
+        best = int(max(counts, key=counts.get), 2)
+    selected = [node for node in range(n_qubits) if not best >> node & 1]
+    return _repair_independent_set(kernel, selected), engine
+
+
+def solve_with_reduction(G, kernel_solver=qaoa_kernel_solver):
+    """
+    Reduce G, solve every kernel with kernel_solver(kernel) -> (selected kernel nodes,
+    solver name) and lift the result back. Returns (selected vertices of G, total weight,
+    solver name of each kernel).
+    """
+    reduction = reduce_mwis(G)
+    solutions = [kernel_solver(kernel) for kernel, _ in reduction.kernels]
+    selected = reduction.lift([solution for solution, _ in solutions])
+    return selected, sum(_weight(G, node) for node in selected), [solver for _, solver in solutions]
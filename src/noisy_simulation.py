@@ -0,0 +1,165 @@
+import atexit
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from qiskit_aer.noise import NoiseModel, depolarizing_error
+
+from instrumentation import stage, count, traced_call, merge, is_enabled
+from qaoa_template import get_template
+from simulator_session import get_simulator
+
+# Noise models are built once per set of error rates and reused, so the simulator cache
+# in simulator_session (keyed by noise model) keeps hitting
+_noise_models = {}
+# Trajectories of one point are split into this many shares, each run with its own seed
+TRAJECTORY_SHARES = 8
+
+# One trajectory worker pool per (noise model, method): (noise model, executor)
+_pools = {}
+# Noise model and method of this process when it is a trajectory worker
+_worker_noise_model = None
+_worker_method = None
+
+
+def get_noise_model(single_qubit_error=0.001, two_qubit_error=0.01):
+    """
+    Depolarizing noise on every gate of the QAOA circuit (h, rx, rz and rzz, plus cx in
+    case a backend decomposes rzz), built once per pair of error rates.
+    """
+    key = (float(single_qubit_error), float(two_qubit_error))
+    if key not in _noise_models:
+        # Keep the circuit's own gates as the basis so transpile does not rewrite them
+        noise_model = NoiseModel(basis_gates=["h", "rx", "rz", "rzz", "cx"])
+        noise_model.add_all_qubit_quantum_error(depolarizing_error(single_qubit_error, 1), ["h", "rx", "rz"])
+        noise_model.add_all_qubit_quantum_error(depolarizing_error(two_qubit_error, 2), ["cx", "rzz"])
+        _noise_models[key] = noise_model
+    return _noise_models[key]
+
+
+def _init_worker(noise_model, method):
+    global _worker_noise_model, _worker_method
+    _worker_noise_model = noise_model
+    _worker_method = method
+    # Parallelism comes from the worker processes, so each simulator stays single-threaded
+    get_simulator(noise_model=noise_model, method=method).set_options(max_parallel_threads=1)
+
+
+def _trajectory_expectations(simulator, tasks):
+    """<C> of every (bound circuit, trajectories, seed) task, one run per task."""
+    values = []
+    with stage("trajectories"):
+        for circuit, shots, seed in tasks:
+            # One circuit per run: in a batch Aer derives each circuit's seed from its position
+            result = simulator.run(circuit, shots=shots, seed_simulator=seed).result()
+            values.append(float(np.real(result.data(0)["expectation_value"])))
+    return values
+
+
+def _run_trajectories(tasks):
+    # Worker task
+    simulator = get_simulator(noise_model=_worker_noise_model, method=_worker_method)
+    return _trajectory_expectations(simulator, tasks)
+
+
+def _share_seeds(seed, params, n_shares):
+    """Seeds of the trajectory shares of one point, a function of seed and the angles only."""
+    angles = np.round(np.asarray(params, dtype=float), 12) + 0.0  # + 0.0 turns -0.0 into 0.0
+    key = np.frombuffer(angles.tobytes(), dtype=np.uint32).tolist()
+    return [int(s) & 0x7FFFFFFF for s in np.random.SeedSequence([seed] + key).generate_state(n_shares)]
+
+
+def _get_pool(noise_model, method, workers):
+    key = (id(noise_model), method)
+    if key not in _pools:
+        # Aer's OpenMP threads do not survive fork(), so the workers are spawned
+        pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"),
+                                   initializer=_init_worker, initargs=(noise_model, method))
+        _pools[key] = (noise_model, pool)
+    return _pools[key][1]
+
+
+def shutdown_pools():
+    """Stop every trajectory worker pool (also run at exit)."""
+    for _, pool in _pools.values():
+        pool.shutdown(cancel_futures=True)
+    _pools.clear()
+
+
+atexit.register(shutdown_pools)
+
+
+class NoisyEvaluator:
+    """
+    Noisy <C> of the depth-p QAOA circuit for one BQM under noise_model.
+
+    Up to MAX_DENSITY_MATRIX_QUBITS qubits the circuit is simulated once as a density
+    matrix, which gives the exact noisy expectation. Larger circuits average `trajectories`
+    Monte-Carlo noise trajectories of the statevector, split into TRAJECTORY_SHARES
+    shares whose seeds depend only on `seed` and the angles (common random numbers): the
+    same point gets the same estimate whether it is evaluated alone or in a batch, and
+    whatever the number of workers. The shares of all requested points are spread over
+    `workers` processes; by default all cores, or 1 inside a worker process of another
+    pool (multi_start, batch_run) so pools are not nested.
+    In both cases <C> is read from a saved expectation value, so there is no shot noise
+    from measurement on top of the trajectory average.
+    """
+
+    def __init__(self, n_qubits, p, bqm, noise_model, trajectories=256, workers=None, seed=0):
+        self.p = p
+        self.noise_model = noise_model
+        self.trajectories = trajectories
+        if workers is None:
+            workers = 1 if multiprocessing.parent_process() is not None else os.cpu_count() or 1
+        self.workers = workers
+        self.simulator = get_simulator(n_qubits, noise_model=noise_model)
+        self.method = self.simulator.options.method
+        self.exact = self.method == "density_matrix"
+        self.seed = seed
+        self.shares = [len(share) for share in np.array_split(np.arange(trajectories), TRAJECTORY_SHARES) if len(share)]
+
+        self.template = get_template(n_qubits, p, bqm)
+        self.circuit = self.template.transpiled(self.simulator, measure=False).copy()
+        self.circuit.save_expectation_value(self.template.observable, list(range(n_qubits)))
+
+    def _bind(self, params):
+        return self.circuit.assign_parameters(self.template.parameter_binding(params))
+
+    def expectations(self, params_batch):
+        """Noisy <C> for every [betas, gammas] row of params_batch."""
+        circuits = [self._bind(params) for params in params_batch]
+        count("cost_evaluations", len(circuits))
+        with stage("noisy_simulation"):
+            if self.exact:
+                result = self.simulator.run(circuits, shots=1).result()
+                return np.array([np.real(result.data(i)["expectation_value"]) for i in range(len(circuits))])
+
+            tasks = [(circuit, shots, seed)
+                     for circuit, params in zip(circuits, params_batch)
+                     for shots, seed in zip(self.shares, _share_seeds(self.seed, params, len(self.shares)))]
+            if self.workers == 1:
+                values = _trajectory_expectations(self.simulator, tasks)
+            else:
+                pool = _get_pool(self.noise_model, self.method, self.workers)
+                chunks = [c for c in np.array_split(np.arange(len(tasks)), self.workers) if len(c)]
+                futures = [pool.submit(traced_call, is_enabled(), _run_trajectories, [tasks[i] for i in chunk])
+                           for chunk in chunks]
+                values = []
+                for future in futures:
+                    chunk_values, report = future.result()
+                    merge(report)
+                    values.extend(chunk_values)
+            return np.reshape(values, (len(circuits), len(self.shares))) @ self.shares / self.trajectories
+
+    def expectation(self, betas, gammas):
+        return float(self.expectations([np.concatenate([betas, gammas])])[0])
+
+
+def noisy_cost_function(params, p, evaluator):
+    """Same interface as statevector_cost_function, for a NoisyEvaluator."""
+    return evaluator.expectation(params[:p], params[p:])
+
+
+def noisy_batch_cost_function(params_batch, p, evaluator):
+    return evaluator.expectations(params_batch)
@@ -0,0 +1,75 @@
+import numpy as np
+
+from ising_model import as_bqm
+
+
+def _cos_products(gamma_values, couplings):
+    """Product over the given couplings of cos(2 * gamma * J), for every gamma."""
+    result = np.ones_like(gamma_values)
+    for coupling in couplings:
+        result = result * np.cos(2 * gamma_values * coupling)
+    return result
+
+
+def p1_landscape(bqm, beta_values, gamma_values):
+    """
+    Closed-form <C(beta, gamma)> of the p = 1 QAOA circuit from qaoa_circuit for an Ising
+    BQM (C = offset + sum h_i Z_i + sum J_ij Z_i Z_j), without any simulation.
+
+    Every Z_i and Z_i Z_j term has an analytic expectation that depends only on the
+    fields and couplings around it, and each splits into functions of beta times
+    functions of gamma. The whole mesh is therefore a sum of three outer products and
+    costs O(|E| * max degree * len(gamma_values)) plus the mesh size.
+
+    Returns an array of shape (len(beta_values), len(gamma_values)), the layout expected
+    by generate_chart.generate_heatmap.
+    """
+    bqm = as_bqm(bqm)
+    beta_values = np.asarray(beta_values, dtype=float)
+    gamma_values = np.asarray(gamma_values, dtype=float)
+
+    fields = np.zeros_like(gamma_values)      # sum_u h_u <Z_u> / sin(2 beta)
+    single_flip = np.zeros_like(gamma_values)  # ZZ terms / (sin(4 beta) / 2)
+    double_flip = np.zeros_like(gamma_values)  # ZZ terms / (-sin^2(2 beta) / 2)
+
+    for u, h_u in bqm.linear.items():
+        if h_u:
+            fields += h_u * np.sin(2 * gamma_values * h_u) * _cos_products(gamma_values, bqm.adj[u].values())
+
+    for (u, v), j_uv in bqm.quadratic.items():
+        if not j_uv:
+            continue
+        h_u = bqm.linear[u]
+        h_v = bqm.linear[v]
+        adj_u = {w: j for w, j in bqm.adj[u].items() if w != v}
+        adj_v = {w: j for w, j in bqm.adj[v].items() if w != u}
+
+        single_flip += j_uv * np.sin(2 * gamma_values * j_uv) * (
+            np.cos(2 * gamma_values * h_u) * _cos_products(gamma_values, adj_u.values())
+            + np.cos(2 * gamma_values * h_v) * _cos_products(gamma_values, adj_v.values())
+        )
+
+        others = set(adj_u) | set(adj_v)
+        sums = [adj_u.get(w, 0.0) + adj_v.get(w, 0.0) for w in others]
+        differences = [adj_u.get(w, 0.0) - adj_v.get(w, 0.0) for w in others]
+        double_flip += j_uv * (
+            np.cos(2 * gamma_values * (h_u + h_v)) * _cos_products(gamma_values, sums)
+            - np.cos(2 * gamma_values * (h_u - h_v)) * _cos_products(gamma_values, differences)
+        )
+
+    return (bqm.offset
+            + np.outer(np.sin(2 * beta_values), fields)
+            + np.outer(np.sin(4 * beta_values) / 2, single_flip)
+            - np.outer(np.sin(2 * beta_values) ** 2 / 2, double_flip))
+
+
+def best_p1_angles(bqm, grid_resolution):
+    """
+    Minimum of the closed-form p = 1 landscape on the same beta/gamma grid as
+    estimator_run_qaoa_grid. Returns (best_beta, best_gamma, best_cost).
+    """
+    beta_range = np.linspace(0, np.pi, grid_resolution)
+    gamma_range = np.linspace(0, 2 * np.pi, grid_resolution * 2)
+    landscape = p1_landscape(bqm, beta_range, gamma_range)
+    i, j = np.unravel_index(np.argmin(landscape), landscape.shape)
+    return np.array([beta_range[i]]), np.array([gamma_range[j]]), landscape[i, j]
@@ -0,0 +1,113 @@
+import json
+import os
+import re
+
+import numpy as np
+
+from adaptive_grid import canonical_angles
+
+
+def graph_family(file_path):
+    """Family of a corpus instance, e.g. 'input/graph15_7.txt' -> 'graph15'."""
+    name = os.path.splitext(os.path.basename(file_path))[0]
+    match = re.match(r"(graph\d+)_\d+$", name)
+    return match.group(1) if match else name
+
+
+def interp_parameters(beta, gamma):
+    """
+    INTERP initial angles for depth p + 1 from optimized depth-p angles:
+    x'_i = (i - 1) / p * x_{i-1} + (p - i + 1) / p * x_i for i = 1..p+1, with x_0 = x_{p+1} = 0.
+    """
+    def interpolate(x):
+        x = np.asarray(x, dtype=float)
+        p = len(x)
+        padded = np.concatenate([[0.0], x, [0.0]])
+        i = np.arange(1, p + 2)
+        return (i - 1) / p * padded[i - 1] + (p - i + 1) / p * padded[i]
+
+    return interpolate(beta), interpolate(gamma)
+
+
+def _fourier_bases(p, q):
+    # Rows are layers i = 1..p, columns are frequencies k = 1..q
+    angles = np.outer(np.arange(1, p + 1) - 0.5, np.arange(1, q + 1) - 0.5) * np.pi / p
+    return np.cos(angles), np.sin(angles)
+
+
+def fourier_parameters(beta, gamma):
+    """
+    FOURIER initial angles for depth p + 1: fit the depth-p angles with p cosine (beta)
+    and sine (gamma) modes, then evaluate the same modes on p + 1 layers.
+    """
+    p = len(beta)
+    cos_basis, sin_basis = _fourier_bases(p, p)
+    v = np.linalg.solve(cos_basis, np.asarray(beta, dtype=float))
+    u = np.linalg.solve(sin_basis, np.asarray(gamma, dtype=float))
+    cos_next, sin_next = _fourier_bases(p + 1, p)
+    return cos_next @ v, sin_next @ u
+
+
+class ParameterStore:
+    """
+    Optimized QAOA angles persisted as JSON, keyed by graph family and depth.
+    Angles from instances of the same family are pooled: by parameter concentration
+    their median is a good start for any other instance of that family, and the
+    depth-p median is extrapolated (INTERP or FOURIER) to start depth p + 1. Every optimum
+    is first brought to its canonical copy (adaptive_grid.canonical_angles, with the gamma
+    period recorded for its instance), so optima of mirror basins are not averaged.
+    """
+
+    def __init__(self, path="output/parameter_store.json"):
+        self.path = path
+        self.entries = {}
+        if os.path.exists(path):
+            with open(path, "r") as f:
+                self.entries = json.load(f)
+
+    def save(self):
+        folder = os.path.dirname(self.path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.entries, f, indent=1)
+        os.replace(tmp_path, self.path)
+
+    def record(self, family, p, beta, gamma, energy, graph=None, gamma_period=None, save=True):
+        self.entries.setdefault(family, {}).setdefault(str(p), []).append({
+            "graph": graph,
+            "beta": [float(x) for x in beta],
+            "gamma": [float(x) for x in gamma],
+            "energy": float(energy),
+            "gamma_period": gamma_period,
+        })
+        if save:
+            self.save()
+
+    def concentrated(self, family, p):
+        """Elementwise median of the canonical (beta, gamma) over the stored instances, or None."""
+        records = self.entries.get(family, {}).get(str(p))
+        if not records:
+            return None
+        angles = [canonical_angles(r["beta"], r["gamma"], r.get("gamma_period")) for r in records]
+        beta = np.median([b for b, _ in angles], axis=0)
+        gamma = np.median([g for _, g in angles], axis=0)
+        return beta, gamma
+
+    def initial_params(self, family, p, strategy="interp"):
+        """
+        Initial [betas, gammas] for depth p: the concentrated depth-p angles if any,
+        otherwise the closest shallower stored depth extrapolated layer by layer,
+        otherwise None (callers then fall back to a random start).
+        """
+        stored = self.concentrated(family, p)
+        if stored is None:
+            depths = [int(d) for d in self.entries.get(family, {}) if int(d) < p]
+            if not depths:
+                return None
+            stored = self.concentrated(family, max(depths))
+            extrapolate = interp_parameters if strategy == "interp" else fourier_parameters
+            while len(stored[0]) < p:
+                stored = extrapolate(*stored)
+        return np.concatenate(stored)
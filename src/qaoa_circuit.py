@@ -2,23 +2,104 @@ from qiskit import QuantumCircuit
 from qiskit.circuit.library import RZZGate
 import numpy as np
 
-def qaoa_circuit(betas, gammas, n_qubits, bqm):
+from instrumentation import timed
+from ising_model import as_ising
+
+# How the ZZ rotations of a cost layer are ordered:
+#   - "sequential": in edge order, as they come out of the BQM;
+#   - "coloring": grouped into matchings (an edge coloring), so each group is one layer of depth;
+#   - "swap_network": odd-even swap network on a line of qubits, for linear coupling maps.
+DEFAULT_SCHEDULE = "coloring"
+
+
+def edge_coloring(n_qubits, edges):
+    """
+    Partition edges into matchings: returns a list of layers, each a list of edge indices
+    no two of which share a qubit. Greedy over edges with the busiest endpoints first,
+    which in practice stays at or close to the max-degree (Vizing) lower bound.
+    """
+    edges = np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+    degree = np.bincount(edges.ravel(), minlength=n_qubits)
+    order = np.argsort(-(degree[edges[:, 0]] + degree[edges[:, 1]]), kind="stable")
+    used = [0] * n_qubits  # bitmask of the colors already used at each qubit
+    layers = []
+    for k in order.tolist():
+        u, v = edges[k].tolist()
+        taken = used[u] | used[v]
+        color = (~taken & (taken + 1)).bit_length() - 1  # lowest free color
+        if color == len(layers):
+            layers.append([])
+        layers[color].append(k)
+        used[u] |= 1 << color
+        used[v] |= 1 << color
+    return layers
+
+
+def _append_swap_network(circuit, order, h, couplings, gamma):
+    """
+    One cost layer as an odd-even transposition network on the line 0..n-1: position i
+    holds variable order[i], neighbours that share an edge get their ZZ rotation, and
+    every pair is swapped. The network stops as soon as all edges have been applied,
+    so order is updated in place with the permutation left at the end.
+    """
+    n = len(order)
+    for position, variable in enumerate(order):
+        circuit.rz(2 * gamma * h[variable], position)
+    remaining = len(couplings)
+    round_ = 0
+    while remaining:
+        for i in range(round_ % 2, n - 1, 2):
+            pair = (min(order[i], order[i + 1]), max(order[i], order[i + 1]))
+            if pair in couplings:
+                circuit.append(RZZGate(2 * gamma * couplings[pair]), [i, i + 1])
+                remaining -= 1
+            circuit.swap(i, i + 1)
+            order[i], order[i + 1] = order[i + 1], order[i]
+        round_ += 1
+
+
+@timed("circuit")
+def qaoa_circuit(betas, gammas, n_qubits, bqm, schedule=None):
+    """
+    QAOA circuit of depth len(betas) for the BQM (or IsingModel), cost layer ordered by
+    schedule (see DEFAULT_SCHEDULE). All ZZ terms commute, so every schedule prepares
+    the same state, except that a swap network leaves the variables permuted: then
+    circuit.metadata["final_order"][i] is the variable held by qubit i at the end.
+    """
     if len(betas) != len(gammas):
         raise ValueError("The number of beta and gamma parameters must be the same.")
+    schedule = schedule or DEFAULT_SCHEDULE
 
+    ising = as_ising(bqm)
+    h, edges, J = ising.h.tolist(), ising.edges.tolist(), ising.J.tolist()
     circuit = QuantumCircuit(n_qubits)
     circuit.h(range(n_qubits))  # Apply Hadamard gates
 
+    if schedule == "sequential":
+        layers = [list(range(len(edges)))]
+    elif schedule == "coloring":
+        layers = edge_coloring(n_qubits, ising.edges)
+    elif schedule == "swap_network":
+        couplings = {(min(i, j), max(i, j)): coeff for (i, j), coeff in zip(edges, J)}
+        order = list(range(n_qubits))
+    else:
+        raise ValueError(f"Unknown cost layer schedule: {schedule}")
+
     for beta, gamma in zip(betas, gammas):
         # Apply Cost Hamiltonian evolution
-        for qubit, coeff in bqm.linear.items():
-            circuit.rz(2 * gamma * coeff, qubit)
-
-        for (i, j), coeff in bqm.quadratic.items():
-            circuit.append(RZZGate(2 * gamma * coeff), [i, j])
+        if schedule == "swap_network":
+            _append_swap_network(circuit, order, h, couplings, gamma)
+        else:
+            for qubit, coeff in enumerate(h):
+                circuit.rz(2 * gamma * coeff, qubit)
+            for layer in layers:
+                for k in layer:
+                    circuit.append(RZZGate(2 * gamma * J[k]), edges[k])
 
         # Apply Mixer Hamiltonian evolution
         for qubit in range(n_qubits):
             circuit.rx(2 * beta, qubit)
-    return circuit
 
+    if schedule == "swap_network" and order != sorted(order):
+        circuit.metadata = {"final_order": order}
+    return circuit
@@ -0,0 +1,102 @@
+import weakref
+
+import numpy as np
+from qiskit import ClassicalRegister, transpile
+from qiskit.circuit import ParameterVector
+
+from qaoa_circuit import qaoa_circuit, DEFAULT_SCHEDULE
+from cost_hamiltonian import bqm_to_pauli_sumop
+from ising_model import as_ising
+from instrumentation import stage
+
+# BQMs are unhashable, so templates are keyed by id() and dropped when the BQM is collected
+_templates = {}
+
+
+class QAOATemplate:
+    """
+    Parameterized QAOA circuit for one (BQM, p), built once with Qiskit ParameterVectors.
+    Circuit parameters are ordered beta[0..p-1], gamma[0..p-1], the same layout as the
+    params arrays passed to the cost functions, so evaluation only binds numbers.
+
+    When the cost layer schedule leaves the variables permuted (a swap network), the
+    observable is laid out on the qubits holding each variable at the end and the
+    measurement writes every variable to its own classical bit, so users of the template
+    never see the permutation.
+    """
+
+    def __init__(self, n_qubits, p, bqm, schedule=None):
+        self.n_qubits = n_qubits
+        self.p = p
+        ising = as_ising(bqm)
+        # Identifies the problem for caches that outlive this template (the BQM itself is
+        # not kept, so the template does not keep it alive)
+        self.fingerprint = ising.fingerprint()
+        self.schedule = schedule or DEFAULT_SCHEDULE
+        self.betas = ParameterVector("beta", p)
+        self.gammas = ParameterVector("gamma", p)
+        # The parameters in the order of a [betas, gammas] row
+        self.parameters = tuple(self.betas) + tuple(self.gammas)
+        self.circuit = qaoa_circuit(self.betas, self.gammas, n_qubits, ising, self.schedule)
+        self.final_order = self.circuit.metadata.get("final_order", list(range(n_qubits)))
+        self.observable = bqm_to_pauli_sumop(ising)
+        if self.final_order != list(range(n_qubits)):
+            self.observable = self.observable.apply_layout(np.argsort(self.final_order).tolist(), n_qubits)
+        self._measured = None
+        self._transpiled = {}
+
+    @property
+    def measured_circuit(self):
+        if self._measured is None:
+            # Same register as measure_all(), so sampler results keep their .meas field
+            self._measured = self.circuit.copy()
+            self._measured.add_register(ClassicalRegister(self.n_qubits, "meas"))
+            self._measured.barrier()
+            self._measured.measure(range(self.n_qubits), self.final_order)
+        return self._measured
+
+    def parameter_values(self, params):
+        """
+        PUB parameter values for V2 primitives: [betas, gammas] rows (any leading shape)
+        keyed by the template's parameters, so they bind by name, not by circuit order.
+        """
+        return {self.parameters: np.asarray(params, dtype=float)}
+
+    def ordered_values(self, params):
+        """One [betas, gammas] row reordered as circuit.parameters, for V1 primitives."""
+        values = dict(zip(self.parameters, np.asarray(params, dtype=float).tolist()))
+        return [values[parameter] for parameter in self.circuit.parameters]
+
+    def parameter_binding(self, params):
+        """{betas: params[:p], gammas: params[p:]}, which does not depend on the parameter order."""
+        params = np.asarray(params, dtype=float)
+        return {self.betas: params[:self.p], self.gammas: params[self.p:]}
+
+    def bind(self, params, measure=False):
+        circuit = self.measured_circuit if measure else self.circuit
+        return circuit.assign_parameters(self.parameter_binding(params))
+
+    def transpiled(self, backend, measure=True):
+        """Parameterized circuit transpiled for backend, transpiled only on first use."""
+        key = (id(backend), measure)
+        if key not in self._transpiled:
+            circuit = self.measured_circuit if measure else self.circuit
+            with stage("transpile"):
+                self._transpiled[key] = transpile(circuit, backend)
+        return self._transpiled[key]
+
+
+def get_template(n_qubits, p, bqm, schedule=None):
+    """
+    QAOATemplate for (bqm, n_qubits, p, schedule), cached for as long as the BQM is alive.
+    The BQM must not be modified after its first template has been built.
+    """
+    key = id(bqm)
+    if key not in _templates:
+        _templates[key] = {}
+        weakref.finalize(bqm, _templates.pop, key, None)
+    templates = _templates[key]
+    template_key = (n_qubits, p, schedule or DEFAULT_SCHEDULE)
+    if template_key not in templates:
+        templates[template_key] = QAOATemplate(n_qubits, p, bqm, schedule)
+    return templates[template_key]
@@ -0,0 +1,82 @@
+import numpy as np
+
+from energy_evaluator import bitstrings_to_bits
+
+
+class PackedCounts:
+    """
+    Measurement results as distinct packed bitstrings plus their shot counts.
+    values[k] holds qubit i in bit i (the integer Qiskit prints as a bitstring) and
+    counts[k] how often it was measured, so statistics never expand per shot.
+    """
+
+    def __init__(self, values, counts, n_qubits):
+        self.values = np.asarray(values, dtype=np.uint64)
+        self.counts = np.asarray(counts, dtype=np.int64)
+        self.n_qubits = n_qubits
+
+    @classmethod
+    def from_samples(cls, samples, n_qubits):
+        """From one packed integer per shot."""
+        values, counts = np.unique(np.asarray(samples, dtype=np.uint64), return_counts=True)
+        return cls(values, counts, n_qubits)
+
+    @classmethod
+    def from_counts(cls, counts, n_qubits=None):
+        """From a Qiskit counts dict {bitstring: count}."""
+        if n_qubits is None:
+            n_qubits = len(next(iter(counts)))
+        bits = bitstrings_to_bits(list(counts.keys()), n_qubits).astype(np.uint64)
+        values = bits @ (np.uint64(1) << np.arange(n_qubits, dtype=np.uint64))
+        frequencies = np.fromiter(counts.values(), dtype=np.int64, count=len(counts))
+        order = np.argsort(values)
+        return cls(values[order], frequencies[order], n_qubits)
+
+    @classmethod
+    def from_bit_array(cls, bit_array):
+        """
+        From a SamplerV2 BitArray of shape () (e.g. result[0].data.meas[i, j]). Its bytes
+        are big-endian per shot, so they are combined into integers without strings.
+        """
+        raw = bit_array.array.astype(np.uint64)
+        n_bytes = raw.shape[-1]
+        shifts = np.uint64(8) * np.arange(n_bytes - 1, -1, -1, dtype=np.uint64)
+        samples = np.bitwise_or.reduce(raw << shifts, axis=-1)
+        return cls.from_samples(samples, bit_array.num_bits)
+
+    @property
+    def shots(self):
+        return int(self.counts.sum())
+
+    def merge(self, other):
+        """Combined counts of two PackedCounts over the same qubits."""
+        values = np.concatenate([self.values, other.values])
+        counts = np.concatenate([self.counts, other.counts])
+        unique, inverse = np.unique(values, return_inverse=True)
+        return PackedCounts(unique, np.bincount(inverse.ravel(), weights=counts).astype(np.int64), self.n_qubits)
+
+    def mean(self, per_value):
+        """Shot-weighted mean of a per-bitstring quantity (e.g. evaluator energies)."""
+        return float(np.dot(per_value, self.counts) / self.shots)
+
+    def variance(self, per_value):
+        mean = self.mean(per_value)
+        return float(np.dot((np.asarray(per_value) - mean) ** 2, self.counts) / self.shots)
+
+    def histogram(self, per_value, bins=200, value_range=None):
+        """Shot-weighted (hist, bin_edges) of a per-bitstring quantity."""
+        return np.histogram(per_value, bins=bins, range=value_range, weights=self.counts)
+
+    def top_k(self, k):
+        """Indices of the k most frequent bitstrings, most frequent first."""
+        k = min(k, len(self.counts))
+        indices = np.argpartition(-self.counts, k - 1)[:k] if k else np.zeros(0, dtype=np.int64)
+        return indices[np.argsort(-self.counts[indices], kind="stable")]
+
+    def bitstrings(self, indices=None):
+        """Qiskit-style bitstrings of the selected (default: all) values."""
+        values = self.values if indices is None else self.values[indices]
+        return [format(int(v), f"0{self.n_qubits}b") for v in values]
+
+    def to_dict(self):
+        return dict(zip(self.bitstrings(), self.counts.tolist()))
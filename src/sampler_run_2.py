@@ -3,6 +3,11 @@ from itertools import product
 from qiskit.circuit.library import QAOAAnsatz
 from qiskit_aer import AerSimulator
 from qaoa_circuit import qaoa_circuit
+from qaoa_template import get_template
+from energy_evaluator import get_evaluator
+from simulator_session import get_simulator
+from job_pipeline import sample_grid, sample_points, MAX_IN_FLIGHT
+from adaptive_sampling import adaptive_grid_expectations
 from qiskit_ibm_runtime import SamplerV2 as Sampler, QiskitRuntimeService
 import numpy as np
 from qiskit_aer.noise import NoiseModel, depolarizing_error
@@ -11,30 +16,17 @@ from qiskit_aer.noise import NoiseModel, depolarizing_error
 def calculate_state_cost(bitstring, G):
     """
     Calculate the cost for a specific bitstring state using a NetworkX graph G.
-    Assumes nodes are labeled 0, 1, ..., n-1.
+    Assumes nodes are labeled 0, 1, ..., n-1 and bitstrings are in Qiskit order.
+    Bit 0 -> z = +1 and bit 1 -> z = -1; the cost is the sum of z_i * z_j over all edges.
     """
-    cost = 0
-    state = [int(bit) for bit in bitstring]
-    # Convert state bits to z-values: bit 0 -> +1 and bit 1 -> -1.
-    z_values = [1 - 2 * bit for bit in state]
-
-    # For each edge in the graph, multiply the corresponding z-values.
-    for i, j in G.edges():
-        cost += z_values[i] * z_values[j]
-
-    return cost
+    return int(get_evaluator(G).edge_costs(bitstring)[0])
 
 def calculate_expectation_value(counts, adj_matrix):
-    total_cost = 0
-    total_shots = sum(counts.values())
-
-    for bitstring, count in counts.items():
-        state_cost = calculate_state_cost(bitstring, adj_matrix)
-        total_cost += state_cost * count
-
-    return total_cost / total_shots
+    evaluator = get_evaluator(adj_matrix)
+    return evaluator.expectation(counts, evaluator.edge_costs(counts))
 
-def sampler_run_2(beta_values, gamma_values , n_qubits, cost_hamiltonian, adj_matrix):
+def sampler_run_2(beta_values, gamma_values , n_qubits, cost_hamiltonian, adj_matrix, adaptive=False,
+                  round_shots=128, max_shots=1024, sampler=None, max_in_flight=MAX_IN_FLIGHT):
     noise_model = NoiseModel()
 
     # single_qubit_error = depolarizing_error(0.8, 1)
@@ -42,25 +34,33 @@ def sampler_run_2(beta_values, gamma_values , n_qubits, cost_hamiltonian, adj_ma
     #
     # noise_model.add_all_qubit_quantum_error(single_qubit_error, ["h", "rx", "rz"])
     # noise_model.add_all_qubit_quantum_error(two_qubit_error, ["cx", "rzz"])
-    simulator = AerSimulator()
+    simulator = get_simulator(n_qubits)
     expectation_values = np.zeros((len(beta_values), len(gamma_values)))
     # simulator = AerSimulator(noise_model=noise_model)
-    sampler = Sampler(mode=simulator)
-    circuits = []
+    # Any SamplerV2-like object works, e.g. job_pipeline.LocalRuntimeSampler or a runtime SamplerV2
+    if sampler is None:
+        sampler = Sampler(mode=simulator)
+    template = get_template(n_qubits, 1, cost_hamiltonian)
+    parameter_grid = np.stack(np.meshgrid(beta_values, gamma_values, indexing="ij"), axis=-1)
+    evaluator = get_evaluator(adj_matrix)
+
+    if adaptive:
+        # Shots go in rounds to the points that can still be the minimum
+        flat_grid = parameter_grid.reshape(-1, 2)
+
+        def run_round(indices, shots):
+            return sample_points(sampler, template.measured_circuit, flat_grid[indices], shots,
+                                 max_in_flight=max_in_flight, parameters=template.parameters)
+
+        means, _, shots_used = adaptive_grid_expectations(
+            run_round, len(flat_grid), lambda s: evaluator.edge_costs(s.values),
+            round_shots=round_shots, max_shots=max_shots)
+        print(f"Adaptive sampling used {shots_used.sum()} shots for {len(flat_grid)} grid points")
+        return means.reshape(len(beta_values), len(gamma_values))
 
-    for beta in beta_values:
-        for gamma in gamma_values:
-            qc = qaoa_circuit([beta], [gamma], n_qubits, cost_hamiltonian)
-            qc.measure_all()
-            circuits.append(qc)
-            #expectation_values[i, j] = calculate_expectation_value(counts, adj_matrix)
-    result = sampler.run(circuits).result()
-    print(result)
-    cnt = 0
-    for i in range(0,len(beta_values)):
-        for j in range(0,len(gamma_values)):
-            counts = result[cnt].data.meas.get_counts()
-            cnt += 1
-            expectation_values[i, j] = calculate_expectation_value(counts, adj_matrix)
+    # The grid goes out as several jobs, each reduced to its means as soon as it completes
+    expectation_values[:] = sample_grid(sampler, template.measured_circuit, parameter_grid,
+                                        lambda samples: evaluator.edge_costs(samples.values),
+                                        max_in_flight=max_in_flight, parameters=template.parameters)
 
     return expectation_values
\ No newline at end of file
@@ -0,0 +1,86 @@
+import os
+
+from qiskit_aer import AerSimulator
+
+from instrumentation import stage, count
+from qaoa_template import get_template
+
+# Above this many qubits a dense statevector (16 * 2^n bytes) no longer fits comfortably
+MAX_STATEVECTOR_QUBITS = 28
+# Density matrices square the memory, so they are only used for small noisy circuits
+MAX_DENSITY_MATRIX_QUBITS = 12
+# Qubit-index distance of two-qubit gates below which an MPS stays cheap
+MPS_BANDWIDTH = 4
+
+# One configured simulator per (method, noise model) for the whole process
+_simulators = {}
+
+
+def two_qubit_bandwidth(circuit):
+    """Largest qubit-index distance spanned by a two-qubit gate (0 if there are none)."""
+    bandwidth = 0
+    for instruction in circuit.data:
+        if len(instruction.qubits) == 2:
+            i, j = (circuit.find_bit(q).index for q in instruction.qubits)
+            bandwidth = max(bandwidth, abs(i - j))
+    return bandwidth
+
+
+def choose_method(n_qubits, noise_model=None, circuit=None):
+    """
+    Pick an Aer simulation method:
+      - density_matrix for small noisy circuits (exact noise, no trajectories);
+      - matrix_product_state beyond statevector memory, or for mid-size circuits whose
+        two-qubit gates stay between nearby qubits (low entanglement across cuts);
+      - statevector otherwise (noise is then sampled as per-shot trajectories).
+    """
+    if noise_model is not None and n_qubits <= MAX_DENSITY_MATRIX_QUBITS:
+        return "density_matrix"
+    if n_qubits > MAX_STATEVECTOR_QUBITS:
+        return "matrix_product_state"
+    if circuit is not None and n_qubits > 16 and two_qubit_bandwidth(circuit) <= MPS_BANDWIDTH:
+        return "matrix_product_state"
+    return "statevector"
+
+
+def get_simulator(n_qubits=0, noise_model=None, method=None, circuit=None):
+    """
+    Process-wide AerSimulator for the chosen method and noise model, created once and
+    configured to use every core: threads within an experiment and parallel
+    experiments when many circuits are submitted together.
+    """
+    if method is None:
+        method = choose_method(n_qubits, noise_model, circuit)
+    key = (method, id(noise_model) if noise_model is not None else None)
+    if key not in _simulators:
+        options = dict(method=method,
+                       max_parallel_threads=os.cpu_count() or 0,
+                       max_parallel_experiments=0)
+        if noise_model is not None:
+            options["noise_model"] = noise_model
+        # The noise model is kept alongside so its id() cannot be reused by another object
+        _simulators[key] = (noise_model, AerSimulator(**options))
+    return _simulators[key][1]
+
+
+def qaoa_measured_circuit(betas, gammas, n_qubits, bqm, simulator):
+    """
+    Measured QAOA circuit ready to run on simulator. It comes from the cached template and
+    is transpiled once per (BQM, p, simulator); each call only binds the angles.
+    """
+    template = get_template(n_qubits, len(betas), bqm)
+    return template.transpiled(simulator).assign_parameters({template.betas: betas, template.gammas: gammas})
+
+
+def run_counts(simulator, circuit, shots):
+    """Counts dict of one measured circuit, timed as the "sampling" stage."""
+    count("shots", shots)
+    with stage("sampling"):
+        return simulator.run(circuit, shots=shots).result().get_counts()
+
+
+def run_qaoa_counts(betas, gammas, n_qubits, bqm, shots=1024, simulator=None):
+    if simulator is None:
+        simulator = get_simulator(n_qubits)
+    circuit = qaoa_measured_circuit(betas, gammas, n_qubits, bqm, simulator)
+    return run_counts(simulator, circuit, shots)
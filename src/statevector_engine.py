@@ -0,0 +1,141 @@
+import numpy as np
+
+from instrumentation import count
+from ising_model import as_ising
+
+
+def cost_vector(n_qubits, bqm):
+    """
+    Diagonal of the cost Hamiltonian in the computational basis.
+    Entry k is the energy of basis state |k>, where qubit i is bit i of k (Qiskit ordering)
+    and bit 0 corresponds to Z = +1. Variables are used directly as qubit indices,
+    exactly as in qaoa_circuit. bqm may also be an IsingModel.
+    """
+    return as_ising(bqm).cost_vector(n_qubits)
+
+
+def apply_mixer(state, beta, n_qubits):
+    """
+    Apply RX(2 * beta) to every qubit in place, one butterfly update per qubit.
+    state may also be a (batch, 2^n) array with one beta per row.
+    """
+    c = np.cos(beta)
+    s = -1j * np.sin(beta)
+    if np.ndim(beta):
+        c = c[:, None, None]
+        s = s[:, None, None]
+    for qubit in range(n_qubits):
+        # Second-to-last axis of the view is the bit of this qubit
+        view = state.reshape(state.shape[:-1] + (-1, 2, 2 ** qubit))
+        low = view[..., 0, :].copy()
+        view[..., 0, :] *= c
+        view[..., 0, :] += s * view[..., 1, :]
+        view[..., 1, :] *= c
+        view[..., 1, :] += s * low
+    return state
+
+
+def qaoa_state(betas, gammas, costs):
+    """
+    Statevector produced by qaoa_circuit for the given angles, computed from the
+    precomputed cost vector instead of a QuantumCircuit.
+    """
+    if len(betas) != len(gammas):
+        raise ValueError("The number of beta and gamma parameters must be the same.")
+
+    n_qubits = int(np.log2(len(costs)))
+    state = np.full(len(costs), 1 / np.sqrt(len(costs)), dtype=complex)
+    for beta, gamma in zip(betas, gammas):
+        # Cost layer is diagonal: exp(-i * gamma * C) is an elementwise phase
+        state *= np.exp(-1j * gamma * costs)
+        apply_mixer(state, beta, n_qubits)
+    return state
+
+
+def qaoa_expectation(betas, gammas, costs):
+    state = qaoa_state(betas, gammas, costs)
+    return float(np.dot(np.abs(state) ** 2, costs))
+
+
+def qaoa_expectations(betas, gammas, costs):
+    """
+    Batched qaoa_expectation: betas and gammas have shape (batch, p) and all rows are
+    evolved together as one (batch, 2^n) array.
+    """
+    betas = np.asarray(betas, dtype=float)
+    gammas = np.asarray(gammas, dtype=float)
+    n_qubits = int(np.log2(len(costs)))
+    state = np.full((len(betas), len(costs)), 1 / np.sqrt(len(costs)), dtype=complex)
+    for layer in range(betas.shape[1]):
+        state *= np.exp(-1j * gammas[:, layer, None] * costs)
+        apply_mixer(state, betas[:, layer], n_qubits)
+    return (np.abs(state) ** 2) @ costs
+
+
+def batch_chunk_size(costs, max_amplitudes=2 ** 22):
+    """Number of parameter points per qaoa_expectations call keeping memory bounded."""
+    return max(1, max_amplitudes // len(costs))
+
+
+def statevector_cost_function(params, p, costs):
+    """
+    Drop-in replacement for estimator_run.qaoa_cost_function using a cost vector
+    from cost_vector(). params holds the p betas followed by the p gammas.
+    """
+    count("cost_evaluations")
+    return qaoa_expectation(params[:p], params[p:], costs)
+
+
+def statevector_batch_cost_function(params_batch, p, costs):
+    """Batched statevector_cost_function for a (batch, 2p) array of parameter rows."""
+    params_batch = np.asarray(params_batch, dtype=float)
+    count("cost_evaluations", len(params_batch))
+    return qaoa_expectations(params_batch[:, :p], params_batch[:, p:], costs)
+
+
+def apply_mixer_generator(state, n_qubits):
+    """Return B|state> for the mixer B = sum_i X_i."""
+    result = np.zeros_like(state)
+    for qubit in range(n_qubits):
+        view = state.reshape(-1, 2, 2 ** qubit)
+        result.reshape(-1, 2, 2 ** qubit)[...] += view[:, ::-1, :]
+    return result
+
+
+def qaoa_expectation_and_gradient(betas, gammas, costs):
+    """
+    <C> and its exact gradient with respect to all betas and gammas, by adjoint
+    differentiation: one forward pass, then a single backward sweep that un-applies
+    each layer to the state and to lambda = C|psi>. Costs about three expectation
+    evaluations regardless of p.
+    Returns (value, grad_betas, grad_gammas).
+    """
+    p = len(betas)
+    n_qubits = int(np.log2(len(costs)))
+    state = qaoa_state(betas, gammas, costs)
+    value = float(np.dot(np.abs(state) ** 2, costs))
+    adjoint = costs * state
+
+    grad_betas = np.zeros(p)
+    grad_gammas = np.zeros(p)
+    for layer in reversed(range(p)):
+        # d/d beta of exp(-i beta B) is -i B exp(-i beta B)
+        grad_betas[layer] = 2 * np.vdot(adjoint, apply_mixer_generator(state, n_qubits)).imag
+        apply_mixer(state, -betas[layer], n_qubits)
+        apply_mixer(adjoint, -betas[layer], n_qubits)
+
+        # d/d gamma of exp(-i gamma C) is -i C exp(-i gamma C)
+        grad_gammas[layer] = 2 * np.vdot(adjoint, costs * state).imag
+        phase = np.exp(1j * gammas[layer] * costs)
+        state *= phase
+        adjoint *= phase
+
+    return value, grad_betas, grad_gammas
+
+
+def statevector_cost_and_gradient(params, p, costs):
+    """statevector_cost_function together with its gradient, for minimize(..., jac=True)."""
+    count("cost_evaluations")
+    count("gradient_evaluations")
+    value, grad_betas, grad_gammas = qaoa_expectation_and_gradient(params[:p], params[p:], costs)
+    return value, np.concatenate([grad_betas, grad_gammas])
@@ -0,0 +1,34 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+SRC = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+sys.path.insert(0, SRC)
+
+from cost_hamiltonian import create_cost_hamiltonian_mwis  # noqa: E402
+from graph_io import read_graph  # noqa: E402
+
+# Small corpus instances used by the equivalence checks
+GRAPH_FILES = ["graph_test.txt", "graph5_2.txt"]
+DEPTHS = [1, 2, 3]
+
+
+@pytest.fixture(params=GRAPH_FILES)
+def instance(request):
+    """(graph, MWIS BQM, number of qubits) of one test graph."""
+    G = read_graph(os.path.join(SRC, "input", request.param))
+    return G, create_cost_hamiltonian_mwis(G), G.number_of_nodes()
+
+
+@pytest.fixture(params=DEPTHS)
+def p(request):
+    return request.param
+
+
+@pytest.fixture
+def angles(p):
+    """Fixed random (betas, gammas) for depth p."""
+    rng = np.random.default_rng(p)
+    return rng.uniform(0, 3, p), rng.uniform(0, 6, p)
@@ -0,0 +1,19 @@
+import dimod
+import pytest
+
+from exact_mwis import solve_mwis
+
+
+def _weights_edges(G):
+    return [G.nodes[node].get("weight", 1.0) for node in range(G.number_of_nodes())], list(G.edges())
+
+
+@pytest.mark.parametrize("method", ["branch_and_bound", "enumerate"])
+def test_matches_exact_solver(instance, method):
+    # The MWIS BQM's ground energy is minus the maximum independent set weight
+    G, bqm, _ = instance
+    weights, edges = _weights_edges(G)
+    selected, weight = solve_mwis(weights, edges, method)
+    assert weight == pytest.approx(-dimod.ExactSolver().sample(bqm).first.energy)
+    assert weight == pytest.approx(sum(weights[node] for node in selected))
+    assert not any(u in selected and v in selected for u, v in edges)
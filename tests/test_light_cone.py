@@ -0,0 +1,11 @@
+import numpy as np
+
+from light_cone import LightConeEvaluator
+from statevector_engine import cost_vector, qaoa_expectation
+
+
+def test_light_cones_match_statevector(instance, p, angles):
+    _, bqm, n = instance
+    betas, gammas = angles
+    evaluator = LightConeEvaluator(bqm, p)
+    assert np.isclose(evaluator.expectation(betas, gammas), qaoa_expectation(betas, gammas, cost_vector(n, bqm)))
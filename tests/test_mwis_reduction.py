@@ -0,0 +1,23 @@
+import pytest
+
+from exact_mwis import solve_mwis_graph
+from mwis_reduction import reduce_mwis, solve_with_reduction
+
+
+def _exact_kernel_solver(kernel):
+    return sorted(solve_mwis_graph(kernel)[0]), "exact"
+
+
+def test_reduction_keeps_the_optimum(instance):
+    G, _, _ = instance
+    selected, weight, solvers = solve_with_reduction(G, _exact_kernel_solver)
+    assert weight == pytest.approx(solve_mwis_graph(G)[1])
+    assert not any(u in selected and v in selected for u, v in G.edges())
+    assert solvers == ["exact"] * len(reduce_mwis(G).kernels)
+
+
+def test_qaoa_kernel_solver_returns_independent_sets(instance):
+    G, _, _ = instance
+    selected, _, solvers = solve_with_reduction(G)
+    assert not any(u in selected and v in selected for u, v in G.edges())
+    assert set(solvers) <= {"statevector"}
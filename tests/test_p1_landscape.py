@@ -0,0 +1,14 @@
+import numpy as np
+
+from p1_landscape import p1_landscape
+from statevector_engine import cost_vector, qaoa_expectation
+
+
+def test_closed_form_matches_statevector(instance):
+    _, bqm, n = instance
+    costs = cost_vector(n, bqm)
+    beta_values = np.linspace(0, np.pi, 5)
+    gamma_values = np.linspace(0, 2 * np.pi, 7)
+    landscape = p1_landscape(bqm, beta_values, gamma_values)
+    expected = [[qaoa_expectation([beta], [gamma], costs) for gamma in gamma_values] for beta in beta_values]
+    assert np.allclose(landscape, expected)
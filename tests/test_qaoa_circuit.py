@@ -0,0 +1,28 @@
+import numpy as np
+import pytest
+from qiskit.quantum_info import Statevector
+
+from qaoa_circuit import edge_coloring
+from qaoa_template import get_template
+from statevector_engine import cost_vector, qaoa_expectation
+
+
+@pytest.mark.parametrize("schedule", ["sequential", "coloring", "swap_network"])
+def test_schedules_prepare_the_same_expectation(instance, p, angles, schedule):
+    # The swap network leaves the qubits permuted; the template's observable follows them
+    _, bqm, n = instance
+    betas, gammas = angles
+    template = get_template(n, p, bqm, schedule)
+    state = Statevector(template.bind(np.concatenate([betas, gammas])))
+    assert np.isclose(state.expectation_value(template.observable).real,
+                      qaoa_expectation(betas, gammas, cost_vector(n, bqm)))
+
+
+def test_edge_coloring_layers_are_matchings(instance):
+    G, _, n = instance
+    edges = np.array(list(G.edges()))
+    layers = edge_coloring(n, edges)
+    assert sorted(k for layer in layers for k in layer) == list(range(len(edges)))
+    for layer in layers:
+        qubits = edges[layer].ravel()
+        assert len(set(qubits.tolist())) == len(qubits)
@@ -0,0 +1,49 @@
+import numpy as np
+from qiskit.quantum_info import Statevector
+
+from qaoa_circuit import qaoa_circuit
+from qaoa_template import get_template
+from statevector_engine import cost_vector, qaoa_state, qaoa_expectation, qaoa_expectation_and_gradient
+
+
+def test_cost_vector_matches_bqm_energies(instance):
+    # Qubit i is bit i of the basis index, and bit 0 is spin +1 (vertex selected)
+    _, bqm, n = instance
+    index = np.arange(2 ** n)
+    spins = 1 - 2 * ((index[:, None] >> np.arange(n)) & 1)
+    energies = bqm.energies((spins, list(range(n))))
+    assert np.allclose(cost_vector(n, bqm), energies)
+
+
+def test_state_matches_qiskit(instance, p, angles):
+    _, bqm, n = instance
+    betas, gammas = angles
+    state = qaoa_state(betas, gammas, cost_vector(n, bqm))
+    reference = Statevector(qaoa_circuit(betas, gammas, n, bqm, "sequential")).data
+    assert np.isclose(abs(np.vdot(reference, state)), 1)
+
+
+def test_expectation_matches_qiskit(instance, p, angles):
+    _, bqm, n = instance
+    betas, gammas = angles
+    template = get_template(n, p, bqm)
+    reference = Statevector(template.bind(np.concatenate([betas, gammas]))).expectation_value(template.observable)
+    assert np.isclose(qaoa_expectation(betas, gammas, cost_vector(n, bqm)), reference.real)
+
+
+def test_adjoint_gradient_matches_finite_differences(instance, p, angles):
+    _, bqm, n = instance
+    costs = cost_vector(n, bqm)
+    params = np.concatenate(angles)
+    value, grad_betas, grad_gammas = qaoa_expectation_and_gradient(params[:p], params[p:], costs)
+    assert np.isclose(value, qaoa_expectation(params[:p], params[p:], costs))
+
+    step = 1e-6
+    numeric = np.zeros(2 * p)
+    for k in range(2 * p):
+        shift = np.zeros(2 * p)
+        shift[k] = step
+        plus, minus = params + shift, params - shift
+        numeric[k] = (qaoa_expectation(plus[:p], plus[p:], costs)
+                      - qaoa_expectation(minus[:p], minus[p:], costs)) / (2 * step)
+    assert np.allclose(np.concatenate([grad_betas, grad_gammas]), numeric, rtol=1e-5, atol=1e-5)